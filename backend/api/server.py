@@ -58,7 +58,7 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "database_cards": len(pricer.database.cards),
+        "database_cards": len(pricer.database),
         "available_sets": pricer.database.get_all_sets()
     }
 
@@ -87,12 +87,10 @@ async def identify_card(file: UploadFile = File(...)):
         if not result['success']:
             raise HTTPException(status_code=422, detail=result['error'])
         
-        # Add pricing information for matches
+        # Add pricing information for matches (priced concurrently)
+        pricings = pricer.get_real_pricing_many([PokemonCard(**match['card']) for match in result['matches']])
         enhanced_matches = []
-        for match in result['matches']:
-            card = PokemonCard(**match['card'])
-            pricing = pricer.get_real_pricing(card)
-            
+        for match, pricing in zip(result['matches'], pricings):
             enhanced_match = {
                 **match,
                 'pricing': pricing
@@ -137,10 +135,9 @@ async def search_cards(name: str):
             "count": 0
         }
     
-    # Add pricing for each match
+    # Add pricing for each match (priced concurrently)
     enhanced_matches = []
-    for card in matches:
-        pricing = pricer.get_real_pricing(card)
+    for card, pricing in zip(matches, pricer.get_real_pricing_many(matches)):
         enhanced_matches.append({
             "card": card.to_dict(),
             "pricing": pricing
@@ -202,7 +199,7 @@ def main():
     print("🚀 Starting Pokemon Card Price Checker API")
     print(f"📡 Server: http://{args.host}:{args.port}")
     print(f"📊 API Docs: http://{args.host}:{args.port}/docs")
-    print(f"🔍 Database: {len(pricer.database.cards)} cards loaded")
+    print(f"🔍 Database: {len(pricer.database)} cards loaded")
     
     uvicorn.run(
         "server:app",
@@ -1,5 +1,6 @@
 from .card_database import CardDatabase, PokemonCard
 from .price_scraper import PokemonPriceScraper
 from .price_cache import PriceCacheManager
+from .cv_cache import CVResultCache
 
-__all__ = ['CardDatabase', 'PokemonCard', 'PokemonPriceScraper', 'PriceCacheManager']
\ No newline at end of file
+__all__ = ['CardDatabase', 'PokemonCard', 'PokemonPriceScraper', 'PriceCacheManager', 'CVResultCache']
\ No newline at end of file
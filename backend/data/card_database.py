@@ -1,12 +1,54 @@
-import json
+import difflib
+import functools
 import os
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+import re
+import sqlite3
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 
-@dataclass
+import numpy as np
+import orjson
+
+SEARCH_CACHE_SIZE = 4096
+
+# Trigram fallback for names FTS/LIKE can't find (OCR misreads)
+NGRAM_SIZE = 3
+FUZZY_CANDIDATES = 50  # Names scored per query, by shared trigrams
+FUZZY_MIN_RATIO = 0.75  # Minimum difflib similarity to accept a name
+FUZZY_MAX_NAMES = 3
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'\w+')
+
+def _normalize_query(text: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share a cache entry"""
+    return _WHITESPACE_RE.sub(' ', text).strip().lower()
+
+def _ngrams(text: str) -> set:
+    """Distinct character trigrams of a normalized name, padded at the ends"""
+    padded = f" {text} "
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+def name_similarity(a: str, b: str) -> float:
+    """0..1 similarity of two card names, ignoring case and spacing"""
+    return difflib.SequenceMatcher(None, _normalize_query(a), _normalize_query(b)).ratio()
+
+def name_contains(query: str, card_name: str) -> bool:
+    """
+    True when card_name is a literal match for query, as the substring and
+    full-text name searches find them: it contains every word of the query,
+    or is itself contained in the query
+    """
+    query, card_name = _normalize_query(query), _normalize_query(card_name)
+    return card_name in query or all(word in card_name for word in _WORD_RE.findall(query))
+
+@dataclass(slots=True, frozen=True)
 class PokemonCard:
-    """Data class representing a Pokemon card"""
+    """Data class representing a Pokemon card (immutable, hashable)"""
     name: str
     set_name: str
     set_number: str
@@ -16,21 +58,30 @@ class PokemonCard:
     artist: str = ""
     release_date: Optional[str] = None
     tcg_player_id: Optional[str] = None
+    # to_dict() result, built on first use; search results are memoized,
+    # so the same instances are formatted again and again
+    _dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> Dict:
-        return {
-            'name': self.name,
-            'set_name': self.set_name,
-            'set_number': self.set_number,
-            'rarity': self.rarity,
-            'hp': self.hp,
-            'card_type': self.card_type,
-            'artist': self.artist,
-            'release_date': self.release_date,
-            'tcg_player_id': self.tcg_player_id
-        }
+        cached = self._dict
+        if cached is None:
+            cached = {
+                'name': self.name,
+                'set_name': self.set_name,
+                'set_number': self.set_number,
+                'rarity': self.rarity,
+                'hp': self.hp,
+                'card_type': self.card_type,
+                'artist': self.artist,
+                'release_date': self.release_date,
+                'tcg_player_id': self.tcg_player_id
+            }
+            object.__setattr__(self, '_dict', cached)  # frozen dataclass
+        
+        # Copy, so callers can't alter the cached dict
+        return dict(cached)
 
-@dataclass 
+@dataclass(slots=True, frozen=True)
 class PricePoint:
     """Data class for price information"""
     marketplace: str  # 'ebay', 'tcgplayer', etc.
@@ -44,44 +95,88 @@ class CardDatabase:
     
     def __init__(self, db_path: str = "data/pokemon_comprehensive.db"):
         self.db_path = db_path
-        self.cards = self._load_database()
+        self._lock = threading.Lock()
+        self._has_fts = False
+        self._conn = self._connect()
         
-    def _load_database(self) -> List[PokemonCard]:
-        """Load cards from SQLite database"""
+        # OCR output is noisy and callers retry the same queries, so memoize
+        # lookups on the normalized input (errors are not cached)
+        self._search_by_name_cached = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search_by_name)
+        self._search_by_set_number_cached = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search_by_set_number)
+        
+        # Card columns are only read from SQLite when something needs them;
+        # the SQL search paths never do
+        self._loaded = False
+        # The `cards` tuple, built on first access after the columns change
+        self._cards: Optional[Tuple[PokemonCard, ...]] = None
+        
+        # Every set number in the SQLite table, loaded on the first lookup so
+        # numbers that can't match (OCR noise) are rejected without a query
+        self._known_set_numbers: Optional[frozenset] = None
+        
+        # Trigram -> name ids over the distinct normalized names, built on
+        # the first fuzzy miss
+        self._ngram_names: Optional[List[str]] = None
+        self._ngram_index: Dict[str, List[int]] = {}
+        self._ngram_lock = threading.Lock()
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """
+        Open the connection shared by all queries on this database.
+        sqlite3 keeps compiled statements per connection, so reusing it
+        also skips re-parsing the search queries.
+        """
         if not os.path.exists(self.db_path):
             print(f"Database not found: {self.db_path}")
-            return []
+            return None
+        
+        try:
+            # The lookup and full-text indexes ship with the database
+            # (see create_comprehensive_database.py)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            
+            self._has_fts = self._has_fts_index(conn)
             
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA query_only=1")
+            return conn
+            
+        except Exception as e:
+            print(f"Error opening database: {e}")
+            return None
+    
+    @staticmethod
+    def _has_fts_index(conn: sqlite3.Connection) -> bool:
+        """
+        Whether the database ships the cards_fts name index and this SQLite
+        build can read it; name searches use LIKE when it can't
+        """
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            conn.execute("SELECT rowid FROM cards_fts LIMIT 1").fetchall()
+            return True
+        except sqlite3.Error as e:
+            print(f"Full-text index unavailable, using LIKE search: {e}")
+            return False
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a read query on the shared connection"""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+    
+    def _load_database(self) -> List[PokemonCard]:
+        """Load cards from SQLite database"""
+        if self._conn is None:
+            return []
             
-            cursor.execute("""
+        try:
+            rows = self._query("""
                 SELECT card_id, name, set_name, number, rarity, hp, card_type, 
                        subtype, artist, release_date, market_price
                 FROM cards
-                LIMIT 10000
             """)
             
-            rows = cursor.fetchall()
-            conn.close()
-            
-            cards = []
-            for row in rows:
-                card_id, name, set_name, number, rarity, hp, card_type, subtype, artist, release_date, market_price = row
-                
-                cards.append(PokemonCard(
-                    name=name,
-                    set_name=set_name,
-                    set_number=number or "Unknown",
-                    rarity=rarity or "Unknown",
-                    hp=hp,
-                    card_type=card_type or "Unknown",
-                    artist=artist or "",
-                    release_date=release_date or "",
-                    tcg_player_id=card_id
-                ))
+            cards = [self._row_to_card(row) for row in rows]
             
             print(f"Loaded {len(cards):,} cards from comprehensive database")
             return cards
@@ -90,139 +185,323 @@ class CardDatabase:
             print(f"Error loading database: {e}")
             return []
     
+    @staticmethod
+    def _row_to_card(row: tuple) -> PokemonCard:
+        """Build a PokemonCard from a `cards` table row"""
+        card_id, name, set_name, number, rarity, hp, card_type, subtype, artist, release_date, market_price = row
+        
+        # Low-cardinality fields are interned, so memoized results share
+        # one copy of each set name, rarity, type and date
+        return PokemonCard(
+            name=name,
+            set_name=sys.intern(set_name) if set_name else set_name,
+            set_number=number or "Unknown",
+            rarity=sys.intern(rarity or "Unknown"),
+            hp=hp,
+            card_type=sys.intern(card_type or "Unknown"),
+            artist=artist or "",
+            release_date=sys.intern(release_date or ""),
+            tcg_player_id=card_id
+        )
+    
+    def _set_columns(self, cards: List[PokemonCard]):
+        """
+        Store cards column-wise (one NumPy array per field) so in-memory
+        searches run as vectorized passes instead of per-card Python loops
+        """
+        self.names = np.array([card.name for card in cards], dtype=str)
+        self.names_lower = np.char.lower(self.names)
+        self.set_names = np.array([card.set_name for card in cards], dtype=str)
+        self.set_numbers = np.array([card.set_number for card in cards], dtype=str)
+        self.rarities = np.array([card.rarity for card in cards], dtype=str)
+        # hp of 0 stands in for "no HP" (trainers/energy)
+        self.hps = np.array([card.hp or 0 for card in cards], dtype=np.int32)
+        self.card_types = np.array([card.card_type for card in cards], dtype=str)
+        self.artists = np.array([card.artist for card in cards], dtype=str)
+        self.release_dates = np.array([card.release_date or "" for card in cards], dtype=str)
+        self.tcg_player_ids = np.array([card.tcg_player_id or "" for card in cards], dtype=str)
+        
+        # Hash indexes for the exact lookups: set number -> first row,
+        # normalized name -> rows, so they are single probes, not scans
+        self._set_number_index: Dict[str, int] = {}
+        self._name_index: Dict[str, List[int]] = {}
+        for idx, card in enumerate(cards):
+            self._set_number_index.setdefault(card.set_number, idx)
+            self._name_index.setdefault(_normalize_query(card.name), []).append(idx)
+        
+        self._loaded = True
+        self._cards = None
+        self._ngram_names = None
+        self.clear_search_cache()
+    
+    def _ensure_loaded(self):
+        """Load the card columns on first use"""
+        if not self._loaded:
+            self._set_columns(self._load_database())
+    
+    def _card_at(self, idx: int) -> PokemonCard:
+        """Materialize the PokemonCard stored at a row index"""
+        return PokemonCard(
+            name=str(self.names[idx]),
+            set_name=str(self.set_names[idx]),
+            set_number=str(self.set_numbers[idx]),
+            rarity=str(self.rarities[idx]),
+            hp=int(self.hps[idx]) or None,
+            card_type=str(self.card_types[idx]),
+            artist=str(self.artists[idx]),
+            release_date=str(self.release_dates[idx]),
+            tcg_player_id=str(self.tcg_player_ids[idx]) or None
+        )
+    
+    @property
+    def cards(self) -> Tuple[PokemonCard, ...]:
+        """
+        All cards as PokemonCard objects, materialized once per change to
+        the columns. Read-only: use add_card or assign the property to edit.
+        """
+        self._ensure_loaded()
+        if self._cards is None:
+            self._cards = tuple(self._card_at(i) for i in range(len(self.names)))
+        return self._cards
+    
+    @cards.setter
+    def cards(self, cards: List[PokemonCard]):
+        self._set_columns(cards)
+    
+    def __len__(self) -> int:
+        if not self._loaded and self._conn is not None:
+            try:
+                return self._query("SELECT COUNT(*) FROM cards")[0][0]
+            except Exception as e:
+                print(f"Error counting cards: {e}")
+        
+        self._ensure_loaded()
+        return len(self.names)
+    
     def save_database(self):
         """Save cards to JSON file"""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        with open(self.db_path, 'w') as f:
-            json.dump([card.to_dict() for card in self.cards], f, indent=2)
+        # orjson serializes the dataclasses natively, in C
+        with open(self.db_path, 'wb') as f:
+            f.write(orjson.dumps(self.cards, option=orjson.OPT_INDENT_2))
     
     def add_card(self, card: PokemonCard):
         """Add a card to the database"""
-        self.cards.append(card)
+        self._ensure_loaded()
+        self._append_card(card)
         self.save_database()
     
+    def _append_card(self, card: PokemonCard):
+        """Append one card to the columns and indexes without rebuilding them"""
+        idx = len(self.names)
+        self.names = np.append(self.names, card.name)
+        self.names_lower = np.append(self.names_lower, card.name.lower())
+        self.set_names = np.append(self.set_names, card.set_name)
+        self.set_numbers = np.append(self.set_numbers, card.set_number)
+        self.rarities = np.append(self.rarities, card.rarity)
+        self.hps = np.append(self.hps, np.int32(card.hp or 0))
+        self.card_types = np.append(self.card_types, card.card_type)
+        self.artists = np.append(self.artists, card.artist)
+        self.release_dates = np.append(self.release_dates, card.release_date or "")
+        self.tcg_player_ids = np.append(self.tcg_player_ids, card.tcg_player_id or "")
+        
+        self._set_number_index.setdefault(card.set_number, idx)
+        self._name_index.setdefault(_normalize_query(card.name), []).append(idx)
+        
+        self._cards = None
+        self._ngram_names = None
+        self.clear_search_cache()
+    
     def search_by_name(self, name: str, fuzzy: bool = True) -> List[PokemonCard]:
         """Search for cards by name using database query"""
-        if not os.path.exists(self.db_path):
-            # Fallback to in-memory search
-            results = []
-            name_lower = name.lower().strip()
-            
-            for card in self.cards:
-                card_name_lower = card.name.lower()
-                
-                if fuzzy:
-                    if name_lower in card_name_lower or card_name_lower in name_lower:
-                        results.append(card)
-                else:
-                    if card_name_lower == name_lower:
-                        results.append(card)
-            
-            return results
-        
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if fuzzy:
-                # Fuzzy search with SQL LIKE
-                cursor.execute("""
-                    SELECT card_id, name, set_name, number, rarity, hp, card_type, 
-                           subtype, artist, release_date, market_price
-                    FROM cards
-                    WHERE name LIKE ? OR name LIKE ?
-                    ORDER BY 
-                        CASE WHEN name LIKE ? THEN 1 ELSE 2 END,
-                        market_price DESC
-                    LIMIT 20
-                """, (f"%{name}%", f"{name}%", f"{name}%"))
-            else:
-                # Exact search
-                cursor.execute("""
-                    SELECT card_id, name, set_name, number, rarity, hp, card_type, 
-                           subtype, artist, release_date, market_price
-                    FROM cards
-                    WHERE LOWER(name) = LOWER(?)
-                    ORDER BY market_price DESC
-                    LIMIT 10
-                """, (name,))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            results = []
-            for row in rows:
-                card_id, card_name, set_name, number, rarity, hp, card_type, subtype, artist, release_date, market_price = row
-                
-                results.append(PokemonCard(
-                    name=card_name,
-                    set_name=set_name,
-                    set_number=number or "Unknown",
-                    rarity=rarity or "Unknown",
-                    hp=hp,
-                    card_type=card_type or "Unknown",
-                    artist=artist or "",
-                    release_date=release_date or "",
-                    tcg_player_id=card_id
-                ))
-            
-            return results
-            
+            return list(self._search_by_name_cached(_normalize_query(name), fuzzy))
         except Exception as e:
             print(f"Error searching database: {e}")
             return []
     
-    def search_by_set_number(self, set_number: str) -> Optional[PokemonCard]:
-        """Search for card by set number using database query"""
-        if not os.path.exists(self.db_path):
+    def _search_by_name(self, name: str, fuzzy: bool) -> Tuple[PokemonCard, ...]:
+        """Uncached name search; `name` is already normalized"""
+        if self._conn is None:
             # Fallback to in-memory search
-            for card in self.cards:
-                if card.set_number == set_number:
-                    return card
-            return None
+            self._ensure_loaded()
+            if fuzzy:
+                # Card names containing the query, or contained in it
+                mask = np.char.find(self.names_lower, name) >= 0
+                mask |= np.char.find(name, self.names_lower) >= 0
+                if not mask.any():
+                    return tuple(
+                        self._card_at(i)
+                        for similar in self._similar_names(name)
+                        for i in self._name_index[similar]
+                    )
+            else:
+                return tuple(self._card_at(i) for i in self._name_index.get(name, ()))
+            
+            return tuple(self._card_at(i) for i in np.flatnonzero(mask))
         
-        try:
-            import sqlite3
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        if fuzzy:
+            rows = self._search_fts(name) if self._has_fts else []
+            if rows:
+                return tuple(self._row_to_card(row) for row in rows)
             
-            cursor.execute("""
+            # Fuzzy search with SQL LIKE (substring matches FTS prefixes miss)
+            rows = self._query("""
                 SELECT card_id, name, set_name, number, rarity, hp, card_type, 
                        subtype, artist, release_date, market_price
                 FROM cards
-                WHERE number = ?
-                LIMIT 1
-            """, (set_number,))
+                WHERE name LIKE ? OR name LIKE ?
+                ORDER BY 
+                    CASE WHEN name LIKE ? THEN 1 ELSE 2 END,
+                    market_price DESC
+                LIMIT 20
+            """, (f"%{name}%", f"{name}%", f"{name}%"))
             
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                card_id, card_name, set_name, number, rarity, hp, card_type, subtype, artist, release_date, market_price = row
+            if not rows:
+                rows = self._search_similar(name)
+        else:
+            # Exact search
+            rows = self._query("""
+                SELECT card_id, name, set_name, number, rarity, hp, card_type, 
+                       subtype, artist, release_date, market_price
+                FROM cards
+                WHERE LOWER(name) = LOWER(?)
+                ORDER BY market_price DESC
+                LIMIT 10
+            """, (name,))
+        
+        return tuple(self._row_to_card(row) for row in rows)
+    
+    def _search_fts(self, name: str) -> List[tuple]:
+        """Prefix-match every word of `name` against the FTS index, best bm25 first"""
+        tokens = _WORD_RE.findall(name)
+        if not tokens:
+            return []
+        
+        match_query = " ".join(f'"{token}"*' for token in tokens)
+        
+        return self._query("""
+            SELECT c.card_id, c.name, c.set_name, c.number, c.rarity, c.hp, c.card_type, 
+                   c.subtype, c.artist, c.release_date, c.market_price
+            FROM cards_fts f
+            JOIN cards c ON c.id = f.rowid
+            WHERE cards_fts MATCH ?
+            ORDER BY 
+                CASE WHEN c.name LIKE ? THEN 1 ELSE 2 END,
+                bm25(cards_fts),
+                c.market_price DESC
+            LIMIT 20
+        """, (match_query, f"{name}%"))
+    
+    def _search_similar(self, name: str) -> List[tuple]:
+        """Cards whose name is a close (misspelled) match for `name`, closest name first"""
+        similar = self._similar_names(name)
+        if not similar:
+            return []
+        
+        placeholders = ", ".join("?" * len(similar))
+        return self._query(f"""
+            SELECT card_id, name, set_name, number, rarity, hp, card_type, 
+                   subtype, artist, release_date, market_price
+            FROM cards
+            WHERE LOWER(name) IN ({placeholders})
+            ORDER BY 
+                CASE LOWER(name) {" ".join(f"WHEN ? THEN {rank}" for rank in range(len(similar)))} END,
+                market_price DESC
+            LIMIT 20
+        """, (*similar, *similar))
+    
+    def _ensure_ngram_index(self) -> Tuple[List[str], Dict[str, List[int]]]:
+        """Build the trigram index over distinct normalized card names once"""
+        with self._ngram_lock:
+            if self._ngram_names is None:
+                if self._conn is None:
+                    self._ensure_loaded()
+                    names = list(self._name_index)
+                else:
+                    names = sorted({_normalize_query(row[0]) for row in self._query("SELECT DISTINCT name FROM cards")})
                 
-                return PokemonCard(
-                    name=card_name,
-                    set_name=set_name,
-                    set_number=number or "Unknown",
-                    rarity=rarity or "Unknown",
-                    hp=hp,
-                    card_type=card_type or "Unknown",
-                    artist=artist or "",
-                    release_date=release_date or "",
-                    tcg_player_id=card_id
-                )
-            
-            return None
+                index: Dict[str, List[int]] = {}
+                for name_id, card_name in enumerate(names):
+                    for gram in _ngrams(card_name):
+                        index.setdefault(gram, []).append(name_id)
+                
+                self._ngram_index = index
+                self._ngram_names = names
             
+            return self._ngram_names, self._ngram_index
+    
+    def _similar_names(self, name: str) -> List[str]:
+        """
+        Known names close to a normalized `name`, best first. Only names
+        sharing the most trigrams with it are scored, so a misread like
+        "charlzard" finds "charizard" without comparing every name.
+        """
+        names, index = self._ensure_ngram_index()
+        
+        shared = Counter()
+        for gram in _ngrams(name):
+            shared.update(index.get(gram, ()))
+        
+        scored = []
+        for name_id, _ in shared.most_common(FUZZY_CANDIDATES):
+            ratio = difflib.SequenceMatcher(None, name, names[name_id]).ratio()
+            if ratio >= FUZZY_MIN_RATIO:
+                scored.append((ratio, names[name_id]))
+        
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [card_name for _, card_name in scored[:FUZZY_MAX_NAMES]]
+    
+    def search_by_set_number(self, set_number: str) -> Optional[PokemonCard]:
+        """Search for card by set number using database query"""
+        try:
+            return self._search_by_set_number_cached(set_number.strip())
         except Exception as e:
             print(f"Error searching by set number: {e}")
             return None
     
+    def _search_by_set_number(self, set_number: str) -> Optional[PokemonCard]:
+        """Uncached set number lookup"""
+        if self._conn is None:
+            # Fallback to in-memory search
+            self._ensure_loaded()
+            idx = self._set_number_index.get(set_number)
+            return self._card_at(idx) if idx is not None else None
+        
+        if self._known_set_numbers is None:
+            self._known_set_numbers = frozenset(row[0] for row in self._query("SELECT DISTINCT number FROM cards"))
+        if set_number not in self._known_set_numbers:
+            return None
+        
+        rows = self._query("""
+            SELECT card_id, name, set_name, number, rarity, hp, card_type, 
+                   subtype, artist, release_date, market_price
+            FROM cards
+            WHERE number = ?
+            LIMIT 1
+        """, (set_number,))
+        
+        if rows:
+            return self._row_to_card(rows[0])
+        
+        return None
+    
+    def clear_search_cache(self):
+        """Drop memoized search results (call after the card data changes)"""
+        self._search_by_name_cached.cache_clear()
+        self._search_by_set_number_cached.cache_clear()
+    
     def get_all_sets(self) -> List[str]:
         """Get list of all unique set names"""
-        return list(set(card.set_name for card in self.cards))
+        if not self._loaded and self._conn is not None:
+            try:
+                return [row[0] for row in self._query("SELECT DISTINCT set_name FROM cards ORDER BY set_name")]
+            except Exception as e:
+                print(f"Error listing sets: {e}")
+        
+        self._ensure_loaded()
+        return np.unique(self.set_names).tolist()
     
     def populate_sample_data(self):
         """Add some sample Pokemon cards for testing"""
@@ -4,20 +4,42 @@ Price Cache System for Pokemon Card Price Checker
 Manages cached pricing data and refresh schedules
 """
 
-import json
+import atexit
+import hashlib
+import heapq
 import os
+import queue
+import sqlite3
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 import threading
 import time
-from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+
+import msgpack
+import orjson
+
+CACHE_DB = 'price_cache.db'
+
+# Per-card JSON cache files from older versions, imported into CACHE_DB on
+# startup. The files are left in place (some ship with the repo); the
+# legacy_imports table records which versions have already been read.
+LEGACY_JSON_EXT = '.json'
 
 try:
     from .price_scraper import PokemonPriceScraper
 except ImportError:
     from price_scraper import PokemonPriceScraper
 
-@dataclass
+def _expire_timestamp(cache_expires: str) -> float:
+    """Convert an ISO cache expiry to a naive local UNIX timestamp"""
+    expire_time = datetime.fromisoformat(cache_expires.replace('Z', '+00:00'))
+    return expire_time.replace(tzinfo=None).timestamp()
+
+@dataclass(slots=True)
 class CachedPrice:
     """Cached pricing data with metadata"""
     card_name: str
@@ -27,31 +49,85 @@ class CachedPrice:
     last_updated: str
     cache_expires: str
     raw_data: List[Dict]
+    _expire_ts: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Parse the expiry once; is_expired runs on every cache lookup
+        self._expire_ts = _expire_timestamp(self.cache_expires)
     
     def is_expired(self) -> bool:
         """Check if cache entry has expired"""
-        expire_time = datetime.fromisoformat(self.cache_expires.replace('Z', '+00:00'))
-        return datetime.now() > expire_time.replace(tzinfo=None)
+        return time.time() > self._expire_ts
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+    
+    def summary(self) -> 'CachedSummary':
+        """Everything but raw_data, for the in-memory cache"""
+        return CachedSummary(
+            self.card_name, self.set_name, self.grade_summary, self.total_listings,
+            self.last_updated, self.cache_expires, self._expire_ts
+        )
+
+class CachedSummary(NamedTuple):
+    """In-memory view of a CachedPrice without the raw listings"""
+    card_name: str
+    set_name: str
+    grade_summary: Dict
+    total_listings: int
+    last_updated: str
+    cache_expires: str
+    expire_ts: float
+    
+    def is_expired(self) -> bool:
+        """Check if cache entry has expired"""
+        return time.time() > self.expire_ts
 
 class PriceCacheManager:
     """Manages price caching and background updates"""
     
-    def __init__(self, cache_dir: str = "data/price_cache"):
+    def __init__(self, cache_dir: str = "data/price_cache", mem_max_entries: int = 256):
         self.cache_dir = cache_dir
         self.cache_duration_hours = 6  # Cache expires after 6 hours
         self.popular_cards_refresh_hours = 2  # Popular cards refresh more often
+        self.preload_workers = 4  # Concurrent scrapes when warming the cache
         
         # Create cache directory
         os.makedirs(cache_dir, exist_ok=True)
         
         # Initialize scraper
-        self.scraper = PokemonPriceScraper()
+        self.scraper = PokemonPriceScraper(http_cache_path=os.path.join(cache_dir, 'http_cache'))
+        
+        # Summaries of cache entries kept in memory (LRU, bounded by
+        # mem_max_entries), checked before touching disk. raw_data stays
+        # on disk and is only loaded when asked for.
+        self.mem_max_entries = mem_max_entries
+        self._mem: "OrderedDict[str, CachedSummary]" = OrderedDict()
+        self._mem_lock = threading.RLock()
+        
+        # One lock per card so concurrent misses share a single scrape;
+        # entries are [lock, users, saved_at] and dropped when the last
+        # user leaves, so saved_at only lives while someone is waiting
+        self._key_locks: Dict[str, list] = {}
+        self._locks_guard = threading.Lock()
+        
+        # All entries live in one SQLite file; the connection is shared
+        # between threads, so every statement runs under _db_lock
+        self._db_lock = threading.Lock()
+        self.db = self._connect(os.path.join(cache_dir, CACHE_DB))
+        self._migrate_cache_files()
         
-        # Background update thread
+        # Background update thread, woken by a min-heap of
+        # (expire_ts, card_name, set_name) for the popular cards
         self.update_thread = None
+        self._refresh_heap: List[Tuple[float, str, str]] = []
+        
+        # Write-behind: refreshes made by the background update thread are
+        # queued and persisted by a single writer thread; every other save
+        # is written before get_pricing returns
+        self._write_q: queue.Queue = queue.Queue()
+        self.writer_thread = None
+        self._atexit_registered = False
         self.shutdown_flag = threading.Event()
         
         # Popular cards that get updated more frequently
@@ -65,32 +141,220 @@ class PriceCacheManager:
             ("Mewtwo", "Base Set"),
             ("Mew", "Promo")
         ]
+        # Set view for membership checks; the list keeps preload order
+        self.popular_cards_set = frozenset(self.popular_cards)
+    
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        """Open the cache database and create the schema if needed"""
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # fsync on checkpoint, not every commit
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS prices (
+                key TEXT PRIMARY KEY,
+                card TEXT NOT NULL,
+                set_name TEXT NOT NULL,
+                expires REAL NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_prices_expires ON prices(expires)")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS legacy_imports (
+                name TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL
+            )
+        """)
+        db.commit()
+        return db
+    
+    @staticmethod
+    def _cache_key(card_name: str, set_name: str) -> str:
+        """
+        Canonical cache key for a card: a short hash of the case-folded,
+        stripped names, shared by the database and the in-memory layers
+        """
+        canonical = f"{card_name.strip().lower()}|{set_name.strip().lower()}"
+        return hashlib.blake2b(canonical.encode(), digest_size=12).hexdigest()
+    
+    def _to_row(self, cached_price: CachedPrice) -> Tuple:
+        """Cache row (key, card, set_name, expires, payload) for an entry"""
+        return (
+            self._cache_key(cached_price.card_name, cached_price.set_name),
+            cached_price.card_name,
+            cached_price.set_name,
+            cached_price._expire_ts,
+            msgpack.packb(cached_price.to_dict(), use_bin_type=True)
+        )
+    
+    def _write_rows(self, rows: List[Tuple]):
+        """Upsert cache rows in a single transaction"""
+        with self._db_lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO prices (key, card, set_name, expires, payload) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+    
+    def flush(self):
+        """Checkpoint the WAL so every committed write is on durable storage"""
+        with self._db_lock:
+            self.db.execute("PRAGMA wal_checkpoint(FULL)")
+    
+    def _persist(self, row: Tuple):
+        """Write a cache row; background refreshes go through the writer queue"""
+        if (threading.current_thread() is self.update_thread and
+                self.writer_thread and self.writer_thread.is_alive()):
+            self._write_q.put(row)
+        else:
+            self._write_rows([row])
+    
+    def _writer_loop(self):
+        """Drain the write queue, keeping only the newest row per card"""
+        stop = False
+        while not stop:
+            batch = {}
+            item = self._write_q.get()
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    batch[item[0]] = item
+                try:
+                    item = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if batch:
+                try:
+                    self._write_rows(list(batch.values()))
+                except sqlite3.Error as e:
+                    print(f"❌ Error writing {len(batch)} cache entries: {e}")
     
-    def _get_cache_path(self, card_name: str, set_name: str) -> str:
-        """Get cache file path for a card"""
-        safe_name = f"{card_name}_{set_name}".replace(" ", "_").replace("/", "_")
-        return os.path.join(self.cache_dir, f"{safe_name}.json")
+    @staticmethod
+    def _read_cache_file(path: str) -> Dict:
+        """Decode a legacy JSON cache file"""
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     
-    def _load_cached_price(self, card_name: str, set_name: str) -> Optional[CachedPrice]:
-        """Load cached price data if it exists and is valid"""
-        cache_path = self._get_cache_path(card_name, set_name)
+    def _migrate_cache_files(self):
+        """
+        Import per-card JSON cache files from older versions into the
+        database. Each file version is read once; the files themselves
+        are never modified.
+        """
+        files = {}
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(LEGACY_JSON_EXT) and entry.is_file():
+                    files[entry.name] = (entry.path, entry.stat().st_mtime_ns)
         
-        if not os.path.exists(cache_path):
-            return None
+        if not files:
+            return
+        
+        with self._db_lock:
+            imported = dict(self.db.execute("SELECT name, mtime_ns FROM legacy_imports").fetchall())
+        pending = [(name, path, mtime_ns) for name, (path, mtime_ns) in files.items()
+                   if imported.get(name) != mtime_ns]
+        if not pending:
+            return
+        
+        rows = []
+        for name, path, mtime_ns in pending:
+            try:
+                rows.append(self._to_row(CachedPrice(**self._read_cache_file(path))))
+            except Exception as e:
+                # Unreadable files are still marked, so they aren't retried
+                # until they change
+                print(f"❌ Error importing cache file {path}: {e}")
+        
+        with self._db_lock, self.db:
+            # Never let an old file replace a newer entry for the same card
+            self.db.executemany("""
+                INSERT INTO prices (key, card, set_name, expires, payload) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    card = excluded.card, set_name = excluded.set_name,
+                    expires = excluded.expires, payload = excluded.payload
+                WHERE excluded.expires > prices.expires
+            """, rows)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO legacy_imports (name, mtime_ns) VALUES (?, ?)",
+                [(name, mtime_ns) for name, _, mtime_ns in pending]
+            )
+        print(f"📦 Imported {len(rows)} cache files into {CACHE_DB}")
+    
+    @contextmanager
+    def _card_lock(self, key: str):
+        """Hold the scrape lock for a card, creating it on demand"""
+        with self._locks_guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0, 0.0]
+            entry[1] += 1
         
         try:
-            with open(cache_path, 'r') as f:
-                data = json.load(f)
+            with entry[0]:
+                yield entry
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+    
+    def _mem_get(self, key: str) -> Optional[CachedSummary]:
+        """Look up an in-memory entry and mark it most recently used"""
+        with self._mem_lock:
+            cached_price = self._mem.get(key)
+            if cached_price is not None:
+                self._mem.move_to_end(key)
+            return cached_price
+    
+    def _mem_put(self, key: str, summary: CachedSummary):
+        """Store an in-memory entry, evicting the least recently used ones"""
+        with self._mem_lock:
+            self._mem[key] = summary
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_max_entries:
+                self._mem.popitem(last=False)
+    
+    def _load_cached_price(self, card_name: str, set_name: str,
+                           include_raw: bool = False) -> Optional[Union[CachedSummary, CachedPrice]]:
+        """
+        Load cached price data if it exists and is valid. Returns the
+        in-memory summary unless include_raw asks for the full entry.
+        """
+        key = self._cache_key(card_name, set_name)
+        
+        if not include_raw:
+            with self._mem_lock:
+                summary = self._mem_get(key)
+                if summary is not None:
+                    if not summary.is_expired():
+                        return summary
+                    del self._mem[key]
+        
+        try:
+            with self._db_lock:
+                row = self.db.execute(
+                    "SELECT expires, payload FROM prices WHERE key = ?",
+                    (key,)
+                ).fetchone()
             
-            cached_price = CachedPrice(**data)
+            if row is None:
+                return None
             
-            # Check if expired
-            if cached_price.is_expired():
+            # Check if expired (before paying for decoding the payload)
+            expires, payload = row
+            if time.time() > expires:
                 print(f"💭 Cache expired for {card_name} ({set_name})")
                 return None
             
+            cached_price = CachedPrice(**msgpack.unpackb(payload, raw=False))
+            
             print(f"✅ Cache hit for {card_name} ({set_name})")
-            return cached_price
+            summary = cached_price.summary()
+            self._mem_put(key, summary)
+            return cached_price if include_raw else summary
             
         except Exception as e:
             print(f"❌ Error loading cache for {card_name}: {e}")
@@ -102,7 +366,7 @@ class PriceCacheManager:
         set_name = pricing_data.get('set_name', '')
         
         # Calculate expiration time
-        is_popular = (card_name, set_name) in self.popular_cards
+        is_popular = (card_name, set_name) in self.popular_cards_set
         cache_hours = self.popular_cards_refresh_hours if is_popular else self.cache_duration_hours
         
         expire_time = datetime.now() + timedelta(hours=cache_hours)
@@ -117,12 +381,11 @@ class PriceCacheManager:
             raw_data=pricing_data['raw_data']
         )
         
-        # Save to file
-        cache_path = self._get_cache_path(card_name, set_name)
+        key = self._cache_key(card_name, set_name)
+        self._mem_put(key, cached_price.summary())
         
         try:
-            with open(cache_path, 'w') as f:
-                json.dump(cached_price.to_dict(), f, indent=2)
+            self._persist(self._to_row(cached_price))
             
             cache_type = "popular" if is_popular else "standard"
             print(f"💾 Cached pricing for {card_name} ({cache_type}, expires in {cache_hours}h)")
@@ -132,46 +395,46 @@ class PriceCacheManager:
         
         return cached_price
     
-    def get_pricing(self, card_name: str, set_name: str = "", force_refresh: bool = False) -> Dict:
+    def get_pricing(self, card_name: str, set_name: str = "", force_refresh: bool = False,
+                    include_raw: bool = False) -> Dict:
         """
-        Get pricing data (from cache or fresh scrape)
+        Get pricing data (from cache or fresh scrape).
+        Set include_raw to also return the individual listings.
         """
         print(f"🔍 Getting pricing for: {card_name} ({set_name})")
         
         # Try cache first (unless force refresh)
         if not force_refresh:
-            cached = self._load_cached_price(card_name, set_name)
+            cached = self._load_cached_price(card_name, set_name, include_raw)
             if cached:
-                return {
-                    'success': True,
-                    'source': 'cache',
-                    'card_name': cached.card_name,
-                    'set_name': cached.set_name,
-                    'grade_summary': cached.grade_summary,
-                    'total_listings': cached.total_listings,
-                    'last_updated': cached.last_updated,
-                    'cache_expires': cached.cache_expires
-                }
-        
-        # Cache miss or force refresh - scrape fresh data
-        print(f"🕷️  Scraping fresh pricing data...")
+                return self._pricing_response(cached, 'cache', include_raw)
+        
+        key = self._cache_key(card_name, set_name)
+        requested_at = time.time()
         
         try:
-            pricing_data = self.scraper.get_comprehensive_pricing(card_name, set_name)
-            
-            # Cache the results
-            cached = self._save_cached_price(pricing_data)
+            with self._card_lock(key) as lock_entry:
+                # Another thread may have scraped this card while we waited
+                if force_refresh:
+                    refreshed = lock_entry[2] > requested_at
+                    cached = self._load_cached_price(card_name, set_name, include_raw) if refreshed else None
+                else:
+                    cached = self._load_cached_price(card_name, set_name, include_raw)
+                if cached:
+                    return self._pricing_response(cached, 'fresh' if force_refresh else 'cache', include_raw)
+                
+                # Cache miss or force refresh - scrape fresh data
+                print(f"🕷️  Scraping fresh pricing data...")
+                
+                # Bypass the scraper's own memo: this path runs on a miss,
+                # an expiry or a forced refresh, all of which want new data
+                pricing_data = self.scraper.get_comprehensive_pricing(card_name, set_name, use_cache=False)
+                
+                # Cache the results
+                cached = self._save_cached_price(pricing_data)
+                lock_entry[2] = time.time()
             
-            return {
-                'success': True,
-                'source': 'fresh',
-                'card_name': cached.card_name,
-                'set_name': cached.set_name,
-                'grade_summary': cached.grade_summary,
-                'total_listings': cached.total_listings,
-                'last_updated': cached.last_updated,
-                'cache_expires': cached.cache_expires
-            }
+            return self._pricing_response(cached, 'fresh', include_raw)
             
         except Exception as e:
             print(f"❌ Error getting pricing for {card_name}: {e}")
@@ -180,23 +443,47 @@ class PriceCacheManager:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _pricing_response(cached: Union[CachedSummary, CachedPrice], source: str,
+                          include_raw: bool = False) -> Dict:
+        """Build the get_pricing response for a cache entry"""
+        response = {
+            'success': True,
+            'source': source,
+            'card_name': cached.card_name,
+            'set_name': cached.set_name,
+            'grade_summary': cached.grade_summary,
+            'total_listings': cached.total_listings,
+            'last_updated': cached.last_updated,
+            'cache_expires': cached.cache_expires
+        }
+        if include_raw:
+            response['raw_data'] = cached.raw_data
+        return response
+    
     def preload_popular_cards(self):
         """Preload pricing data for popular cards"""
         print(f"🔥 Preloading {len(self.popular_cards)} popular cards...")
         
-        for card_name, set_name in self.popular_cards:
-            try:
-                result = self.get_pricing(card_name, set_name)
-                if result['success']:
-                    print(f"   ✅ {card_name} ({set_name})")
-                else:
-                    print(f"   ❌ {card_name} ({set_name}): {result.get('error', 'Unknown error')}")
-                
-                # Small delay between requests
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"   ❌ {card_name} ({set_name}): {e}")
+        # Scraping is network-bound; the scraper's own rate limiter keeps
+        # requests spaced out across workers
+        with ThreadPoolExecutor(max_workers=self.preload_workers) as executor:
+            futures = {
+                executor.submit(self.get_pricing, card_name, set_name): (card_name, set_name)
+                for card_name, set_name in self.popular_cards
+            }
+            
+            for future in as_completed(futures):
+                card_name, set_name = futures[future]
+                try:
+                    result = future.result()
+                    if result['success']:
+                        print(f"   ✅ {card_name} ({set_name})")
+                    else:
+                        print(f"   ❌ {card_name} ({set_name}): {result.get('error', 'Unknown error')}")
+                    
+                except Exception as e:
+                    print(f"   ❌ {card_name} ({set_name}): {e}")
         
         print("🎉 Preloading complete!")
     
@@ -208,9 +495,20 @@ class PriceCacheManager:
         
         print("🔄 Starting background price updates...")
         self.shutdown_flag.clear()
+        
+        if not (self.writer_thread and self.writer_thread.is_alive()):
+            self.writer_thread = threading.Thread(target=self._writer_loop)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+        
         self.update_thread = threading.Thread(target=self._background_update_loop)
         self.update_thread.daemon = True
         self.update_thread.start()
+        
+        # Daemon threads die with the process, so drain queued writes on exit
+        if not self._atexit_registered:
+            atexit.register(self.stop_background_updates)
+            self._atexit_registered = True
     
     def stop_background_updates(self):
         """Stop background update thread"""
@@ -218,63 +516,65 @@ class PriceCacheManager:
             print("🛑 Stopping background updates...")
             self.shutdown_flag.set()
             self.update_thread.join(timeout=10)
+        
+        # Drain pending writes before returning
+        if self.writer_thread and self.writer_thread.is_alive():
+            self._write_q.put(None)
+            self.writer_thread.join()
     
     def _background_update_loop(self):
         """Background loop that updates expired popular cards"""
         print("🔄 Background update loop started")
         
-        while not self.shutdown_flag.is_set():
+        # Seed with current expiries; missing entries are due immediately
+        self._refresh_heap = []
+        for card_name, set_name in self.popular_cards:
+            cached = self._load_cached_price(card_name, set_name)
+            heapq.heappush(self._refresh_heap, (cached.expire_ts if cached else 0.0, card_name, set_name))
+        
+        while self._refresh_heap:
+            # Sleep until the earliest expiry (wakes early on shutdown)
+            expire_ts, card_name, set_name = self._refresh_heap[0]
+            if self.shutdown_flag.wait(timeout=max(0.0, expire_ts - time.time())):
+                break
+            heapq.heappop(self._refresh_heap)
+            
             try:
-                # Check popular cards for expired cache
-                for card_name, set_name in self.popular_cards:
-                    if self.shutdown_flag.is_set():
-                        break
-                    
-                    cached = self._load_cached_price(card_name, set_name)
-                    
-                    # If expired or doesn't exist, refresh
-                    if not cached or cached.is_expired():
-                        print(f"🔄 Background refresh: {card_name} ({set_name})")
-                        self.get_pricing(card_name, set_name, force_refresh=True)
-                        
-                        # Wait between updates to be respectful
-                        time.sleep(5)
+                # Someone else may have refreshed it in the meantime
+                cached = self._load_cached_price(card_name, set_name)
+                if cached:
+                    heapq.heappush(self._refresh_heap, (cached.expire_ts, card_name, set_name))
+                    continue
+                
+                print(f"🔄 Background refresh: {card_name} ({set_name})")
+                result = self.get_pricing(card_name, set_name, force_refresh=True)
+                next_ts = _expire_timestamp(result['cache_expires']) if result['success'] else time.time() + 3600
                 
-                # Sleep for an hour before next check
-                for _ in range(3600):  # 1 hour = 3600 seconds
-                    if self.shutdown_flag.is_set():
-                        break
-                    time.sleep(1)
-                    
             except Exception as e:
                 print(f"❌ Background update error: {e}")
-                time.sleep(60)  # Wait a minute before retrying
+                next_ts = time.time() + 60  # Retry in a minute
+            
+            heapq.heappush(self._refresh_heap, (next_ts, card_name, set_name))
+            
+            # Wait between updates to be respectful
+            if self.shutdown_flag.wait(timeout=5):
+                break
         
         print("🔄 Background update loop stopped")
     
     def get_cache_stats(self) -> Dict:
         """Get statistics about cached data"""
-        cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith('.json')]
+        popular_keys = [self._cache_key(card_name, set_name) for card_name, set_name in self.popular_cards]
         
-        total_cached = len(cache_files)
-        expired_count = 0
-        popular_cached = 0
-        
-        for filename in cache_files:
-            try:
-                with open(os.path.join(self.cache_dir, filename), 'r') as f:
-                    data = json.load(f)
-                
-                cached_price = CachedPrice(**data)
-                
-                if cached_price.is_expired():
-                    expired_count += 1
-                
-                if (cached_price.card_name, cached_price.set_name) in self.popular_cards:
-                    popular_cached += 1
-                    
-            except Exception:
-                continue
+        with self._db_lock:
+            total_cached, expired_count = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(expires < ?), 0) FROM prices",
+                (time.time(),)
+            ).fetchone()
+            popular_cached, = self.db.execute(
+                f"SELECT COUNT(*) FROM prices WHERE key IN ({','.join('?' * len(popular_keys))})",
+                popular_keys
+            ).fetchone()
         
         return {
             'total_cached_cards': total_cached,
@@ -286,27 +586,22 @@ class PriceCacheManager:
     
     def clear_expired_cache(self):
         """Remove expired cache entries"""
-        cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith('.json')]
-        removed_count = 0
+        now = time.time()
         
-        for filename in cache_files:
-            filepath = os.path.join(self.cache_dir, filename)
-            
-            try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                
-                cached_price = CachedPrice(**data)
-                
-                if cached_price.is_expired():
-                    os.remove(filepath)
-                    removed_count += 1
-                    print(f"🗑️  Removed expired cache: {cached_price.card_name}")
-                    
-            except Exception as e:
-                print(f"❌ Error checking cache file {filename}: {e}")
+        with self._db_lock, self.db:
+            expired = self.db.execute(
+                "SELECT key, card FROM prices WHERE expires < ?", (now,)
+            ).fetchall()
+            # Only take the write lock when there is something to delete
+            if expired:
+                self.db.execute("DELETE FROM prices WHERE expires < ?", (now,))
+        
+        with self._mem_lock:
+            for key, card_name in expired:
+                self._mem.pop(key, None)
+                print(f"🗑️  Removed expired cache: {card_name}")
         
-        print(f"🧹 Cleaned up {removed_count} expired cache entries")
+        print(f"🧹 Cleaned up {len(expired)} expired cache entries")
 
 def main():
     """Test the price cache system"""
@@ -4,17 +4,196 @@ Pokemon Card Price Scraper
 Gets real pricing data from various auction/marketplace sites
 """
 
+import heapq
+import logging
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 from bs4 import BeautifulSoup
+import threading
 import time
-import json
 import re
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-@dataclass
+import numpy as np
+import orjson
+
+try:
+    from requests_cache import CachedSession
+except ImportError:
+    CachedSession = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+# Dollar amounts in listing text
+PRICE_TEXT_RE = re.compile(r'\$[0-9,]+')
+PRICE_RE = re.compile(r'\$([0-9,]+(?:\.[0-9]{2})?)')
+
+class _NumericChars(dict):
+    """str.translate table keeping only decimal digits and '.'; filled lazily"""
+    
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        kept = codepoint if codepoint == ord('.') or chr(codepoint).isdecimal() else None
+        self[codepoint] = kept
+        return kept
+
+_NUMERIC_ONLY = _NumericChars()
+
+# eBay result price elements
+EBAY_PRICE_CLASS = 's-item__price'
+EBAY_PRICE_SELECTOR = f'.{EBAY_PRICE_CLASS}'
+
+# Real-world pricing data researched from multiple sources
+MARKET_RESEARCH_PRICES = {
+    'charizard': {
+        'base_price': 150,
+        'grades': {
+            'Ungraded': {'multiplier': 1.0, 'variance': 0.4},
+            'PSA 8': {'multiplier': 4.0, 'variance': 0.3},
+            'PSA 9': {'multiplier': 12.0, 'variance': 0.4},
+            'PSA 10': {'multiplier': 35.0, 'variance': 0.5},
+            'BGS 9.5': {'multiplier': 20.0, 'variance': 0.4}
+        }
+    },
+    'pikachu': {
+        'base_price': 25,
+        'grades': {
+            'Ungraded': {'multiplier': 1.0, 'variance': 0.3},
+            'PSA 8': {'multiplier': 3.2, 'variance': 0.3},
+            'PSA 9': {'multiplier': 10.0, 'variance': 0.4},
+            'PSA 10': {'multiplier': 34.0, 'variance': 0.4},
+            'BGS 9.5': {'multiplier': 20.0, 'variance': 0.4}
+        }
+    },
+    'blastoise': {
+        'base_price': 75,
+        'grades': {
+            'Ungraded': {'multiplier': 1.0, 'variance': 0.3},
+            'PSA 8': {'multiplier': 3.3, 'variance': 0.3},
+            'PSA 9': {'multiplier': 10.7, 'variance': 0.4},
+            'PSA 10': {'multiplier': 33.3, 'variance': 0.5},
+            'BGS 9.5': {'multiplier': 18.7, 'variance': 0.4}
+        }
+    }
+}
+
+# Default pricing for unknown cards
+DEFAULT_MARKET_DATA = {
+    'base_price': 20,
+    'grades': {
+        'Ungraded': {'multiplier': 1.0, 'variance': 0.3},
+        'PSA 9': {'multiplier': 5.0, 'variance': 0.4},
+        'PSA 10': {'multiplier': 12.0, 'variance': 0.5}
+    }
+}
+
+# Mock marketplace base prices
+TCGPLAYER_BASE_PRICES = {
+    'charizard': 150.0,
+    'pikachu': 25.0,
+    'blastoise': 75.0,
+    'venusaur': 70.0
+}
+PWCC_BASE_PRICES = {
+    'charizard': 500.0,
+    'pikachu': 150.0
+}
+
+class _CardLookup:
+    """
+    Value of the first key (in dict order) contained in a search term,
+    found with one regex match instead of a substring test per key.
+    Branch i is `.*?(?P<k{i}>key)`, so an earlier key wins wherever
+    it appears in the text
+    """
+    
+    def __init__(self, table: Dict, default=None):
+        self._values = list(table.values())
+        self._default = default
+        self._regex = re.compile(
+            '|'.join(f'.*?(?P<k{i}>{re.escape(key)})' for i, key in enumerate(table)),
+            re.DOTALL
+        )
+    
+    def __call__(self, search_term: str):
+        match = self._regex.match(search_term.lower())
+        return self._values[int(match.lastgroup[1:])] if match else self._default
+
+MARKET_RESEARCH_LOOKUP = _CardLookup(MARKET_RESEARCH_PRICES, DEFAULT_MARKET_DATA)
+TCGPLAYER_PRICE_LOOKUP = _CardLookup(TCGPLAYER_BASE_PRICES, 20.0)
+PWCC_PRICE_LOOKUP = _CardLookup(PWCC_BASE_PRICES, 100.0)  # PWCC tends to have higher-end items
+
+def _find_price_texts(html: bytes) -> List[str]:
+    """
+    Text of eBay price elements, or if the page has none, every text node
+    containing a dollar amount. Parsed with lexbor (C) when selectolax is
+    installed, BeautifulSoup otherwise.
+    """
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        texts = [node.text() for node in tree.css(EBAY_PRICE_SELECTOR)]
+        if not texts:
+            texts = [node.text_content for node in tree.root.traverse(include_text=True) if node.tag == '-text']
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        texts = [node.get_text() for node in soup.select(EBAY_PRICE_SELECTOR)]
+        if not texts:
+            texts = soup.find_all(string=True)
+    
+    return [text for text in texts if PRICE_TEXT_RE.search(text)]
+
+def _stream_price_texts(response: requests.Response, chunk_size: int = 8192) -> List[str]:
+    """
+    Like _find_price_texts, but parses a streamed response incrementally
+    with lxml while it downloads. Elements are cleared once closed so the
+    tree never holds the whole page; only the raw bytes are kept, for the
+    fallback when the page has no price elements.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    body = bytearray()
+    texts = []
+    open_prices = 0
+    
+    for chunk in response.iter_content(chunk_size):
+        body += chunk
+        parser.feed(chunk)
+        
+        for event, element in parser.read_events():
+            is_price = EBAY_PRICE_CLASS in (element.get('class') or '').split()
+            if event == 'start':
+                open_prices += is_price
+                continue
+            
+            if is_price:
+                open_prices -= 1
+                text = ''.join(element.itertext())
+                if PRICE_TEXT_RE.search(text):
+                    texts.append(text)
+            
+            # Keep a price element's children until the element itself closes
+            if not open_prices:
+                element.clear(keep_tail=True)
+    
+    parser.close()
+    return texts or _find_price_texts(bytes(body))
+
+@dataclass(slots=True, frozen=True)
 class PriceData:
     """Individual price data point"""
     marketplace: str
@@ -27,24 +206,125 @@ class PriceData:
     seller_rating: str = ""
     shipping: float = 0.0
 
+def _raw_row(price: PriceData) -> Dict:
+    """One raw_data entry for a price point"""
+    return {
+        'marketplace': price.marketplace,
+        'title': price.title,
+        'price': price.price,
+        'grade': price.grade,
+        'date': price.sale_date,
+        'url': price.url
+    }
+
+def _summarize_by_group(values: np.ndarray, codes: np.ndarray) -> List[Tuple[int, float, float, float, float]]:
+    """
+    Per-group (count, min, max, mean, median) for values labelled 0..k-1 by
+    codes, in code order. Even-sized groups average the two middle values.
+    """
+    # Sort by group, then by value, so each group is a sorted contiguous run
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    sorted_codes = codes[order]
+    
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_values)])
+    
+    mins = sorted_values[starts]
+    maxs = sorted_values[starts + counts - 1]
+    medians = (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+    means = np.add.reduceat(sorted_values, starts) / counts
+    
+    return list(zip(counts.tolist(), mins.tolist(), maxs.tolist(), means.tolist(), medians.tolist()))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: long-run rate of `rate` requests/second,
+    with bursts of up to `burst` requests
+    """
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.timestamp = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.timestamp) * self.rate)
+            self.timestamp = now
+            
+            # Reserve the token now (the balance may go negative) and sleep
+            # outside the lock, so waiters queue up in order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+
 class PokemonPriceScraper:
     """Main scraper class for Pokemon card prices"""
     
-    def __init__(self):
-        self.session = requests.Session()
+    # Shared generator for market-data sampling (seeded once, not per call)
+    _rng = np.random.default_rng()
+    
+    # Pooled keep-alive connections per host
+    pool_size = 20
+    
+    # Recently aggregated results kept in memory (per scraper)
+    result_cache_size = 512
+    result_cache_ttl = 3600  # seconds
+    
+    # Cached marketplace pages; no longer than the price cache's shortest
+    # refresh interval (popular cards), so a refresh never reuses older pages
+    http_cache_hours = 2
+    
+    def __init__(self, http_cache_path: Optional[str] = "data/price_cache/http_cache"):
+        # Marketplace pages are cached on disk (SQLite) when requests-cache
+        # is installed, so repeat lookups skip the network
+        if CachedSession is not None and http_cache_path:
+            os.makedirs(os.path.dirname(http_cache_path) or '.', exist_ok=True)
+            self.session = CachedSession(
+                http_cache_path,
+                backend='sqlite',
+                expire_after=timedelta(hours=self.http_cache_hours),
+                allowable_codes=(200,),
+                stale_if_error=True
+            )
+        else:
+            self.session = requests.Session()
+        # Keep enough pooled connections per host for the source, batch and
+        # preload workers to reuse warm connections instead of re-handshaking
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         # Add headers to look like a real browser
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # Only advertise encodings urllib3 can decode (br needs brotli)
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         })
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_delay = 2  # Seconds between requests
+        # Rate limiting: one token bucket per host
+        self.min_delay = 2  # Long-run seconds between requests to a host
+        self.burst_size = 3  # Requests a host may get back-to-back
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()  # Scraper is shared by preload workers
+        
+        # LRU of (card, set) -> (expires_at, JSON-encoded pricing dict);
+        # each hit decodes a fresh copy so callers can't mutate the entry
+        self._results: "OrderedDict[Tuple[str, str], Tuple[float, bytes]]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        
+        # Marketplaces are scraped concurrently; each source is network-bound
+        self._source_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="scrape")
         
         # Grading patterns
         self.grade_patterns = {
@@ -59,51 +339,70 @@ class PokemonPriceScraper:
             r'Heavy(ly)?\s*Played': lambda m: "Heavily Played",
             r'Damaged': lambda m: "Damaged"
         }
+        
+        # All grade patterns as one anchored regex. Branch i is
+        # `.*?(?P<g{i}>pattern)`, so the first pattern (in dict order) found
+        # anywhere in the text wins, exactly as when searching them one by one
+        self._grade_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.grade_patterns]
+        self._grade_formatters = list(self.grade_patterns.values())
+        self._grade_re = re.compile(
+            '|'.join(f'.*?(?P<g{i}>{pattern})' for i, pattern in enumerate(self.grade_patterns)),
+            re.IGNORECASE | re.DOTALL
+        )
     
-    def _wait_for_rate_limit(self):
-        """Ensure we don't make requests too quickly"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+    def _wait_for_rate_limit(self, url: str):
+        """Ensure we don't make requests to a host too quickly"""
+        host = urllib.parse.urlparse(url).netloc
         
-        if time_since_last < self.min_delay:
-            sleep_time = self.min_delay - time_since_last
-            time.sleep(sleep_time)
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            with self._buckets_lock:
+                bucket = self.buckets.setdefault(host, TokenBucket(1.0 / self.min_delay, self.burst_size))
         
-        self.last_request_time = time.time()
+        bucket.acquire()
+    
+    def _is_cached(self, url: str, headers: Dict) -> bool:
+        """Whether a fresh response for this GET is already in the HTTP cache"""
+        cache = getattr(self.session, 'cache', None)
+        if cache is None:
+            return False
+        
+        request = self.session.prepare_request(requests.Request('GET', url, headers=headers))
+        response = cache.get_response(cache.create_key(request))
+        return response is not None and not response.is_expired
     
     def _extract_grade(self, text: str) -> str:
         """Extract card grade from title/description"""
         if not text:
             return "Ungraded"
         
-        text_upper = text.upper()
-        
-        for pattern, formatter in self.grade_patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return formatter(match)
+        match = self._grade_re.match(text)
+        if not match:
+            return "Ungraded"
         
-        return "Ungraded"
+        # Re-match the winning pattern on its own so formatters see their groups
+        i = int(match.lastgroup[1:])
+        return self._grade_formatters[i](self._grade_regexes[i].match(match.group(match.lastgroup)))
     
     def _extract_price(self, price_text: str) -> float:
         """Extract numerical price from price string"""
         if not price_text:
             return 0.0
         
-        # Remove currency symbols and clean up
-        price_clean = re.sub(r'[,$£€¥]', '', price_text)
-        price_clean = re.sub(r'[^\d.]', '', price_clean)
+        # Drop currency symbols, separators and anything else non-numeric
+        price_clean = price_text.translate(_NUMERIC_ONLY)
         
         try:
             return float(price_clean)
         except (ValueError, TypeError):
             return 0.0
     
-    def scrape_ebay_sold(self, search_term: str, limit: int = 20) -> List[PriceData]:
+    def scrape_ebay_sold(self, search_term: str, limit: int = 20, refresh: bool = False) -> List[PriceData]:
         """
         Scrape eBay sold listings for Pokemon cards with improved methods
+        refresh=True bypasses the HTTP cache (the new pages replace the cached ones)
         """
-        print(f"🔍 Scraping eBay sold listings for: {search_term}")
+        logger.info("🔍 Scraping eBay sold listings for: %s", search_term)
         
         results = []
         
@@ -114,13 +413,14 @@ class PokemonPriceScraper:
             search_term
         ]
         
+        # requests-cache re-fetches instead of serving a stored page
+        get_options = {'force_refresh': True} if refresh and hasattr(self.session, 'cache') else {}
+        
         for query in search_queries[:2]:  # Try first 2 queries
             try:
                 encoded_query = urllib.parse.quote_plus(query)
                 url = f"https://www.ebay.com/sch/i.html?_nkw={encoded_query}&LH_Sold=1&LH_Complete=1&_sop=13"
                 
-                self._wait_for_rate_limit()
-                
                 # Use mobile user agent for better success
                 headers = {
                     'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1',
@@ -128,19 +428,26 @@ class PokemonPriceScraper:
                     'Accept-Language': 'en-US,en;q=0.5',
                 }
                 
-                response = self.session.get(url, headers=headers)
+                # Cached pages don't touch the site, so they skip the limiter
+                if refresh or not self._is_cached(url, headers):
+                    self._wait_for_rate_limit(url)
+                
+                # With lxml the page is parsed as it streams in
+                response = self.session.get(url, headers=headers, stream=etree is not None, **get_options)
                 
                 if response.status_code != 200:
+                    response.close()
                     continue
                     
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
                 # Look for any text containing dollar amounts (improved method)
-                price_texts = soup.find_all(string=re.compile(r'\$[0-9,]+'))
+                if etree is not None:
+                    price_texts = _stream_price_texts(response)
+                else:
+                    price_texts = _find_price_texts(response.content)
                 
                 extracted_prices = []
                 for price_text in price_texts:
-                    price_match = re.search(r'\$([0-9,]+(?:\.[0-9]{2})?)', price_text)
+                    price_match = PRICE_RE.search(price_text)
                     if price_match:
                         try:
                             price_value = float(price_match.group(1).replace(',', ''))
@@ -151,6 +458,7 @@ class PokemonPriceScraper:
                 
                 # If we found reasonable prices, create PriceData objects
                 if extracted_prices:
+                    today = datetime.now().strftime('%Y-%m-%d')
                     for i, price in enumerate(extracted_prices[:limit]):
                         grade = self._extract_grade(f"pokemon card ${price}")
                         
@@ -159,104 +467,53 @@ class PokemonPriceScraper:
                             title=f"{search_term} - Sold Listing",
                             price=price,
                             grade=grade,
-                            sale_date=datetime.now().strftime('%Y-%m-%d'),
+                            sale_date=today,
                             url=url,
                             condition="Sold Listing"
                         ))
                     
-                    print(f"   ✅ Found {len(results)} eBay real prices")
+                    logger.info("   ✅ Found %s eBay real prices", len(results))
                     return results
                     
             except Exception as e:
-                print(f"   ⚠️ eBay query failed: {e}")
+                logger.warning("   ⚠️ eBay query failed: %s", e)
                 continue
         
         # Fallback to realistic market data
-        print(f"   📊 Using researched market data for {search_term}")
+        logger.info("   📊 Using researched market data for %s", search_term)
         return self._generate_realistic_market_data(search_term, limit)
     
     def _generate_realistic_market_data(self, search_term: str, limit: int = 20) -> List[PriceData]:
         """
         Generate realistic pricing based on actual market research
         """
-        # Real-world pricing data researched from multiple sources
-        realistic_prices = {
-            'charizard': {
-                'base_price': 150,
-                'grades': {
-                    'Ungraded': {'multiplier': 1.0, 'variance': 0.4},
-                    'PSA 8': {'multiplier': 4.0, 'variance': 0.3},
-                    'PSA 9': {'multiplier': 12.0, 'variance': 0.4},
-                    'PSA 10': {'multiplier': 35.0, 'variance': 0.5},
-                    'BGS 9.5': {'multiplier': 20.0, 'variance': 0.4}
-                }
-            },
-            'pikachu': {
-                'base_price': 25,
-                'grades': {
-                    'Ungraded': {'multiplier': 1.0, 'variance': 0.3},
-                    'PSA 8': {'multiplier': 3.2, 'variance': 0.3},
-                    'PSA 9': {'multiplier': 10.0, 'variance': 0.4},
-                    'PSA 10': {'multiplier': 34.0, 'variance': 0.4},
-                    'BGS 9.5': {'multiplier': 20.0, 'variance': 0.4}
-                }
-            },
-            'blastoise': {
-                'base_price': 75,
-                'grades': {
-                    'Ungraded': {'multiplier': 1.0, 'variance': 0.3},
-                    'PSA 8': {'multiplier': 3.3, 'variance': 0.3},
-                    'PSA 9': {'multiplier': 10.7, 'variance': 0.4},
-                    'PSA 10': {'multiplier': 33.3, 'variance': 0.5},
-                    'BGS 9.5': {'multiplier': 18.7, 'variance': 0.4}
-                }
-            }
-        }
+        card_data = MARKET_RESEARCH_LOOKUP(search_term)
         
-        # Find matching card data
-        card_key = None
-        for key in realistic_prices.keys():
-            if key in search_term.lower():
-                card_key = key
-                break
-        
-        if not card_key:
-            # Default pricing for unknown cards
-            card_data = {
-                'base_price': 20,
-                'grades': {
-                    'Ungraded': {'multiplier': 1.0, 'variance': 0.3},
-                    'PSA 9': {'multiplier': 5.0, 'variance': 0.4},
-                    'PSA 10': {'multiplier': 12.0, 'variance': 0.5}
-                }
-            }
-        else:
-            card_data = realistic_prices[card_key]
+        grades = list(card_data['grades'])
+        multipliers = np.array([g['multiplier'] for g in card_data['grades'].values()])
+        variances = np.array([g['variance'] for g in card_data['grades'].values()])
         
-        results = []
-        import random
+        # Generate 2-4 sales per grade, all grades sampled in one go
+        num_sales = self._rng.integers(2, 5, size=len(grades))
+        base_prices = np.repeat(card_data['base_price'] * multipliers, num_sales)
+        spread = np.repeat(variances, num_sales)
         
-        for grade, grade_data in card_data['grades'].items():
-            base_price = card_data['base_price'] * grade_data['multiplier']
-            variance = grade_data['variance']
-            
-            # Generate 2-4 sales per grade
-            num_sales = random.randint(2, 4)
-            
-            for _ in range(num_sales):
-                # Add realistic variance
-                price = base_price * (1 + random.uniform(-variance, variance))
-                price = max(price, 5.0)  # Minimum $5
-                
-                results.append(PriceData(
-                    marketplace="eBay",
-                    title=f"{search_term} {grade}",
-                    price=round(price, 2),
-                    grade=grade,
-                    sale_date=datetime.now().strftime('%Y-%m-%d'),
-                    url="https://ebay.com/itm/realistic-market-data",
-                    condition="Market Research Data"
-                ))
+        # Add realistic variance, minimum $5
+        prices = np.maximum(base_prices * (1 + self._rng.uniform(-spread, spread)), 5.0).round(2)
+        
+        today = datetime.now().strftime('%Y-%m-%d')
+        results = [
+            PriceData(
+                marketplace="eBay",
+                title=f"{search_term} {grade}",
+                price=price,
+                grade=grade,
+                sale_date=today,
+                url="https://ebay.com/itm/realistic-market-data",
+                condition="Market Research Data"
+            )
+            for grade, price in zip(np.repeat(grades, num_sales).tolist(), prices.tolist())
+        ]
         
         return results[:limit]
     
@@ -283,31 +540,19 @@ class PokemonPriceScraper:
         Scrape TCGPlayer for current market prices
         Note: TCGPlayer has anti-scraping measures, this is a simplified version
         """
-        print(f"🔍 Scraping TCGPlayer for: {search_term}")
+        logger.info("🔍 Scraping TCGPlayer for: %s", search_term)
         
         results = []
         
         # This would require more sophisticated techniques in production
         # For now, we'll return mock data based on search term
         
-        base_prices = {
-            'charizard': 150.0,
-            'pikachu': 25.0,
-            'blastoise': 75.0,
-            'venusaur': 70.0
-        }
-        
-        search_lower = search_term.lower()
-        base_price = 20.0  # Default
-        
-        for card, price in base_prices.items():
-            if card in search_lower:
-                base_price = price
-                break
+        base_price = TCGPLAYER_PRICE_LOOKUP(search_term)
         
         # Generate mock TCGPlayer data with realistic variations
         grades = ['Ungraded', 'PSA 8', 'PSA 9', 'PSA 10']
         multipliers = [1.0, 2.0, 3.5, 6.0]
+        today = datetime.now().strftime('%Y-%m-%d')
         
         for grade, multiplier in zip(grades, multipliers):
             results.append(PriceData(
@@ -315,31 +560,27 @@ class PokemonPriceScraper:
                 title=f"{search_term} - {grade}",
                 price=base_price * multiplier,
                 grade=grade,
-                sale_date=datetime.now().strftime('%Y-%m-%d'),
+                sale_date=today,
                 url=f"https://tcgplayer.com/search/{urllib.parse.quote(search_term)}",
                 condition="Market Price"
             ))
         
-        print(f"   ✅ Generated {len(results)} TCGPlayer market prices")
+        logger.info("   ✅ Generated %s TCGPlayer market prices", len(results))
         return results
     
     def scrape_pwcc(self, search_term: str, limit: int = 10) -> List[PriceData]:
         """
         Scrape PWCC Marketplace (high-end graded cards)
         """
-        print(f"🔍 Scraping PWCC for: {search_term}")
+        logger.info("🔍 Scraping PWCC for: %s", search_term)
         
         # PWCC typically has high-grade cards, so we'll focus on those
         results = []
         
         # Mock PWCC data - would need real scraping implementation
         high_grades = ['PSA 9', 'PSA 10', 'BGS 9.5', 'BGS 10']
-        base_price = 100.0  # PWCC tends to have higher-end items
-        
-        if 'charizard' in search_term.lower():
-            base_price = 500.0
-        elif 'pikachu' in search_term.lower():
-            base_price = 150.0
+        base_price = PWCC_PRICE_LOOKUP(search_term)
+        today = datetime.now().strftime('%Y-%m-%d')
         
         for grade in high_grades:
             multiplier = 1.0
@@ -353,50 +594,101 @@ class PokemonPriceScraper:
                 title=f"{search_term} {grade}",
                 price=base_price * multiplier,
                 grade=grade,
-                sale_date=datetime.now().strftime('%Y-%m-%d'),
+                sale_date=today,
                 url=f"https://pwccmarketplace.com/search/{urllib.parse.quote(search_term)}",
                 condition="Auction"
             ))
         
-        print(f"   ✅ Generated {len(results)} PWCC auction prices")
+        logger.info("   ✅ Generated %s PWCC auction prices", len(results))
         return results
     
-    def get_comprehensive_pricing(self, card_name: str, set_name: str = "") -> Dict:
+    def _cached_result(self, key: Tuple[str, str]) -> Optional[Dict]:
+        """Unexpired in-memory result for key, marked most recently used"""
+        with self._results_lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._results[key]
+                return None
+            self._results.move_to_end(key)
+            payload = entry[1]
+        return orjson.loads(payload)
+    
+    def _store_result(self, key: Tuple[str, str], result: Dict):
+        """Remember a result, evicting the least recently used ones"""
+        payload = orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+        with self._results_lock:
+            self._results[key] = (time.monotonic() + self.result_cache_ttl, payload)
+            self._results.move_to_end(key)
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+    
+    def get_comprehensive_pricing(self, card_name: str, set_name: str = "", use_cache: bool = True) -> Dict:
+        """
+        Get pricing from multiple sources and aggregate. Repeat lookups
+        within result_cache_ttl are answered from memory unless use_cache
+        is False, which also bypasses the HTTP page cache; a fresh result
+        always replaces the remembered one.
+        """
+        key = (card_name.strip().lower(), set_name.strip().lower())
+        
+        if use_cache:
+            cached = self._cached_result(key)
+            if cached is not None:
+                logger.info("⚡ Using in-memory pricing for: %s %s", card_name, set_name)
+                return cached
+        
+        result = self._aggregate_pricing(card_name, set_name, refresh=not use_cache)
+        self._store_result(key, result)
+        return result
+    
+    def _aggregate_pricing(self, card_name: str, set_name: str, refresh: bool = False) -> Dict:
         """
-        Get pricing from multiple sources and aggregate
+        Scrape every marketplace and aggregate the prices by grade
+        refresh=True skips cached marketplace pages
         """
         search_term = f"{card_name} {set_name}".strip()
         
-        print(f"💰 Getting comprehensive pricing for: {search_term}")
+        logger.info("💰 Getting comprehensive pricing for: %s", search_term)
         
         all_prices = []
         
-        # Scrape from multiple sources
-        try:
-            ebay_prices = self.scrape_ebay_sold(search_term, limit=15)
-            all_prices.extend(ebay_prices)
-        except Exception as e:
-            print(f"   ❌ eBay failed: {e}")
-        
-        try:
-            tcg_prices = self.scrape_tcgplayer(search_term, limit=8)
-            all_prices.extend(tcg_prices)
-        except Exception as e:
-            print(f"   ❌ TCGPlayer failed: {e}")
+        # Scrape from multiple sources at once; results are collected in
+        # source order so the aggregate doesn't depend on which finishes first
+        sources = [
+            ("eBay", self.scrape_ebay_sold, {'limit': 15, 'refresh': refresh}),
+            ("TCGPlayer", self.scrape_tcgplayer, {'limit': 8}),
+            ("PWCC", self.scrape_pwcc, {'limit': 6})
+        ]
+        futures = [
+            self._source_executor.submit(scrape, search_term, **options)
+            for _, scrape, options in sources
+        ]
         
-        try:
-            pwcc_prices = self.scrape_pwcc(search_term, limit=6)
-            all_prices.extend(pwcc_prices)
-        except Exception as e:
-            print(f"   ❌ PWCC failed: {e}")
+        for (marketplace, _, _), future in zip(sources, futures):
+            try:
+                all_prices.extend(future.result())
+            except Exception as e:
+                logger.warning("   ❌ %s failed: %s", marketplace, e)
         
-        # Aggregate by grade
+        # One pass over all_prices builds the raw rows, the per-grade sales
+        # and the price/grade-code arrays for the vectorised statistics
+        # (grade codes follow first appearance)
         grade_data = {}
+        grade_index = {}
+        grade_codes = []
+        price_values = []
+        raw_data = []
         
         for price in all_prices:
             grade = price.grade
-            if grade not in grade_data:
+            code = grade_index.get(grade)
+            if code is None:
+                code = grade_index[grade] = len(grade_data)
                 grade_data[grade] = []
+            grade_codes.append(code)
+            price_values.append(price.price)
             
             grade_data[grade].append({
                 'price': price.price,
@@ -404,21 +696,26 @@ class PokemonPriceScraper:
                 'date': price.sale_date,
                 'url': price.url
             })
+            raw_data.append(_raw_row(price))
         
         # Calculate statistics for each grade
         grade_summary = {}
         
-        for grade, prices in grade_data.items():
-            price_values = [p['price'] for p in prices]
+        if all_prices:
+            stats = _summarize_by_group(
+                np.array(price_values, dtype=np.float64),
+                np.array(grade_codes, dtype=np.int32)
+            )
             
-            grade_summary[grade] = {
-                'count': len(price_values),
-                'min_price': min(price_values),
-                'max_price': max(price_values),
-                'avg_price': sum(price_values) / len(price_values),
-                'median_price': sorted(price_values)[len(price_values)//2],
-                'recent_sales': sorted(prices, key=lambda x: x['date'], reverse=True)[:5]
-            }
+            for (grade, prices), (count, min_price, max_price, avg_price, median_price) in zip(grade_data.items(), stats):
+                grade_summary[grade] = {
+                    'count': count,
+                    'min_price': min_price,
+                    'max_price': max_price,
+                    'avg_price': avg_price,
+                    'median_price': median_price,
+                    'recent_sales': heapq.nlargest(5, prices, key=lambda x: x['date'])
+                }
         
         return {
             'card_name': card_name,
@@ -427,20 +724,22 @@ class PokemonPriceScraper:
             'total_listings': len(all_prices),
             'last_updated': datetime.now().isoformat(),
             'grade_summary': grade_summary,
-            'raw_data': [
-                {
-                    'marketplace': p.marketplace,
-                    'title': p.title,
-                    'price': p.price,
-                    'grade': p.grade,
-                    'date': p.sale_date,
-                    'url': p.url
-                } for p in all_prices
-            ]
+            'raw_data': raw_data
         }
 
+    def get_comprehensive_pricing_batch(self, cards: List[Tuple[str, str]], max_workers: int = 4) -> List[Dict]:
+        """
+        Get pricing for several (card_name, set_name) pairs concurrently.
+        Results come back in input order; the shared session and rate
+        limiter keep requests polite across workers.
+        """
+        # Separate pool from _source_executor: card workers block on it
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pricing") as executor:
+            return list(executor.map(lambda card: self.get_comprehensive_pricing(*card), cards))
+
 def main():
     """Test the price scraper"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     scraper = PokemonPriceScraper()
     
     # Test with a popular card
@@ -450,13 +749,13 @@ def main():
         ("Blastoise", "Base Set")
     ]
     
-    for card_name, set_name in test_cards:
+    results = scraper.get_comprehensive_pricing_batch(test_cards)
+    
+    for (card_name, set_name), pricing_data in zip(test_cards, results):
         print(f"\n{'='*60}")
         print(f"Testing: {card_name} ({set_name})")
         print('='*60)
         
-        pricing_data = scraper.get_comprehensive_pricing(card_name, set_name)
-        
         print(f"\n📊 Results Summary:")
         print(f"Total listings found: {pricing_data['total_listings']}")
         print(f"Grades with data: {list(pricing_data['grade_summary'].keys())}")
@@ -471,13 +770,10 @@ def main():
         
         # Save detailed results
         output_file = f"pricing_data_{card_name.lower().replace(' ', '_')}.json"
-        with open(output_file, 'w') as f:
-            json.dump(pricing_data, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(pricing_data, option=orjson.OPT_INDENT_2))
         
         print(f"\n💾 Detailed data saved to: {output_file}")
-        
-        # Add delay between cards
-        time.sleep(3)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
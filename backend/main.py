@@ -6,55 +6,81 @@ Combines computer vision identification with database lookup
 
 import sys
 import os
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
 
+import numpy as np
+import orjson
+
 # Add backend to path
 sys.path.append(os.path.dirname(__file__))
 
 from cv.card_identifier import PokemonCardIdentifier
-from data.card_database import CardDatabase, PokemonCard
+from data.card_database import CardDatabase, PokemonCard, name_contains, name_similarity
 from data.price_cache import PriceCacheManager
+from data.cv_cache import CVResultCache
+
+# Comprehensive database: resolved once per process, next to this file or
+# in the repo-level data directory
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_DB_PATH = os.path.join(_BACKEND_DIR, "data", "pokemon_comprehensive.db")
+if not os.path.exists(_DEFAULT_DB_PATH):
+    _DEFAULT_DB_PATH = os.path.join(os.path.dirname(_BACKEND_DIR), "data", "pokemon_comprehensive.db")
+
+# Fallback pricing: base price by rarity (5 for anything else), famous
+# cards get price multipliers, and each grade a fixed multiple of the base
+FALLBACK_RARITY_BASE_PRICES = {
+    "Holo Rare": 50,
+    "Rare": 15,
+    "Uncommon": 3
+}
+FALLBACK_NAME_MULTIPLIERS = {
+    "Charizard": 5.0,
+    "Pikachu": 2.0,
+    "Blastoise": 3.0,
+    "Venusaur": 3.0
+}
+FALLBACK_GRADES = ['Ungraded', 'PSA 8', 'PSA 9', 'PSA 10', 'BGS 9.5']
+FALLBACK_GRADE_MULTIPLIERS = np.array([1.0, 2.0, 4.0, 8.0, 6.0])
 
 class PokemonCardPricer:
     """Main class that ties together identification and pricing"""
     
+    # Shared generator for fallback pricing noise (seeded once, not per call)
+    _rng = np.random.default_rng()
+    
     def __init__(self, db_path: str = None):
         self.identifier = PokemonCardIdentifier()
         
-        # Smart database path resolution
-        if db_path is None:
-            import os
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            db_path = os.path.join(current_dir, "data", "pokemon_comprehensive.db")
-            
-            # Fallback if not found
-            if not os.path.exists(db_path):
-                db_path = os.path.join(os.path.dirname(current_dir), "data", "pokemon_comprehensive.db")
-        
-        self.database = CardDatabase(db_path)
+        self.database = CardDatabase(db_path or _DEFAULT_DB_PATH)
         self.price_cache = PriceCacheManager()
+        self.cv_cache = CVResultCache()
         
-        # Log database size
-        print(f"🎴 Initialized with {len(self.database.cards):,} cards from comprehensive database")
+        # Log database size (counted once; each len() is a query)
+        card_count = len(self.database)
+        print(f"🎴 Initialized with {card_count:,} cards from comprehensive database")
         
         # Initialize with sample data if database is empty
-        if not self.database.cards:
+        if not card_count:
             print("⚠️ Comprehensive database empty, falling back to sample data...")
             self._create_sample_fallback()
         
-        # Start background price updates
-        self.price_cache.start_background_updates()
+        # Background price updates start with the first pricing request,
+        # so identification-only callers never spawn the threads
+        self._background_started = False
+        self._background_lock = threading.Lock()
     
-    def identify_and_price_card(self, image_path: str) -> Dict:
+    def identify_and_price_card(self, image_path: str, force_refresh: bool = False) -> Dict:
         """
-        Complete pipeline: identify card from image and get pricing info
+        Complete pipeline: identify card from image and get pricing info.
+        Images seen before reuse their identification unless force_refresh.
         """
         print(f"🔍 Analyzing image: {image_path}")
         
         # Step 1: Computer vision identification
-        cv_result = self.identifier.identify_card(image_path)
+        cv_result = self._identify(image_path, force_refresh)
         
         if 'error' in cv_result:
             return {
@@ -84,7 +110,8 @@ class PokemonCardPricer:
             'matches': []
         }
         
-        print(f"\n📚 Found {len(matches)} database matches:")
+        # Match report is built up and written in one go, not line by line
+        report = [f"\n📚 Found {len(matches)} database matches:"]
         
         for match in matches:
             match_info = {
@@ -95,12 +122,36 @@ class PokemonCardPricer:
             result['matches'].append(match_info)
             
             card = match['card']
-            print(f"   🎯 {card.name} ({card.set_name}) - {card.set_number}")
-            print(f"      Confidence: {match['confidence']:.1%}")
-            print(f"      Match reasons: {', '.join(match['reasons'])}")
+            report.append(f"   🎯 {card.name} ({card.set_name}) - {card.set_number}")
+            report.append(f"      Confidence: {match['confidence']:.1%}")
+            report.append(f"      Match reasons: {', '.join(match['reasons'])}")
+        
+        print("\n".join(report))
         
         return result
     
+    def _identify(self, image_path: str, force_refresh: bool = False) -> Dict:
+        """Run the CV pipeline, or reuse the cached result for identical image bytes"""
+        try:
+            image_key = self.cv_cache.image_hash(image_path)
+        except OSError:
+            # Unreadable file: let the identifier report it
+            return self.identifier.identify_card(image_path)
+        
+        if not force_refresh:
+            cached = self.cv_cache.get(image_key)
+            if cached is not None:
+                print("⚡ Using cached identification for this image")
+                return {**cached, 'image_path': image_path}
+        
+        cv_result = self.identifier.identify_card(image_path)
+        
+        # Failures aren't cached, so a retry runs the pipeline again
+        if 'error' not in cv_result:
+            self.cv_cache.put(image_key, cv_result)
+        
+        return cv_result
+    
     def _find_database_matches(self, cv_result: Dict) -> List[Dict]:
         """Find matching cards in database based on CV results"""
         matches = []
@@ -120,25 +171,36 @@ class PokemonCardPricer:
         if cv_result.get('name'):
             name_matches = self.database.search_by_name(cv_result['name'])
             
+            # Per-query values, worked out once rather than per candidate.
+            # Candidates mostly share a few names (one card across sets), so
+            # the base confidence is worked out once per distinct name
+            cv_hp = cv_result.get('hp')
+            cv_number = cv_result['set_number'].partition('/')[0] if cv_result.get('set_number') else None
+            name_scores = {}
+            for card_name in {card.name for card in name_matches}:
+                if name_contains(cv_result['name'], card_name):
+                    name_scores[card_name] = (0.6, 'name_match')
+                else:
+                    # Found by the misread fallback: scale by how close the
+                    # OCR'd name is to the card's
+                    name_scores[card_name] = (0.6 * name_similarity(cv_result['name'], card_name),
+                                              'fuzzy_name_match')
+            
             for card in name_matches:
-                confidence = 0.6  # Base confidence for name match
-                reasons = ['name_match']
+                # Base confidence for name match
+                confidence, name_reason = name_scores[card.name]
+                reasons = [name_reason]
                 
                 # Boost confidence if HP matches
-                if cv_result.get('hp') and card.hp == cv_result['hp']:
+                if cv_hp and card.hp == cv_hp:
                     confidence += 0.25
                     reasons.append('hp_match')
                 
                 # Boost confidence if we have partial set info
-                if cv_result.get('set_number') and card.set_number:
-                    # Check if set numbers are similar
-                    cv_set_parts = cv_result['set_number'].split('/')
-                    db_set_parts = card.set_number.split('/')
-                    
-                    if len(cv_set_parts) >= 1 and len(db_set_parts) >= 1:
-                        if cv_set_parts[0] == db_set_parts[0]:  # Same card number
-                            confidence += 0.2
-                            reasons.append('card_number_match')
+                # (same card number, ignoring the set size)
+                if cv_number is not None and card.set_number and card.set_number.partition('/')[0] == cv_number:
+                    confidence += 0.2
+                    reasons.append('card_number_match')
                 
                 matches.append({
                     'card': card,
@@ -151,10 +213,20 @@ class PokemonCardPricer:
         
         return matches
     
+    def _ensure_background_updates(self):
+        """Start the price cache's background updates on first use"""
+        if not self._background_started:
+            with self._background_lock:
+                if not self._background_started:
+                    self.price_cache.start_background_updates()
+                    self._background_started = True
+    
     def get_real_pricing(self, card: PokemonCard, use_cache: bool = True) -> Dict:
         """
         Get real pricing data from auction sites and marketplaces
         """
+        self._ensure_background_updates()
+        
         try:
             # Get pricing from cache or fresh scrape
             pricing_result = self.price_cache.get_pricing(
@@ -193,52 +265,51 @@ class PokemonCardPricer:
             print(f"❌ Error getting real pricing for {card.name}: {e}")
             return self._get_fallback_pricing(card)
     
+    def get_real_pricing_many(self, cards: List[PokemonCard], use_cache: bool = True,
+                              max_workers: int = 8) -> List[Dict]:
+        """
+        Get real pricing for several cards concurrently, in input order.
+        Lookups are network-bound, so they overlap; repeats of the same
+        card still share one scrape through the price cache's per-card lock.
+        """
+        if len(cards) <= 1:
+            return [self.get_real_pricing(card, use_cache) for card in cards]
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(cards)), thread_name_prefix="pricing") as executor:
+            return list(executor.map(lambda card: self.get_real_pricing(card, use_cache), cards))
+    
     def _get_fallback_pricing(self, card: PokemonCard) -> Dict:
         """Fallback mock pricing when real data isn't available"""
-        import random
-        
         # Mock prices based on rarity and name (similar to old logic)
-        base_price = 5
+        base_price = FALLBACK_RARITY_BASE_PRICES.get(card.rarity, 5) * FALLBACK_NAME_MULTIPLIERS.get(card.name, 1.0)
         
-        if card.rarity == "Holo Rare":
-            base_price = 50
-        elif card.rarity == "Rare":
-            base_price = 15
-        elif card.rarity == "Uncommon":
-            base_price = 3
+        # Generate grade-based pricing with realistic structure, all grades at once
+        avg_prices = base_price * FALLBACK_GRADE_MULTIPLIERS * (0.8 + self._rng.random(len(FALLBACK_GRADES)) * 0.4)
+        sale_counts = self._rng.integers(1, 11, size=len(FALLBACK_GRADES))
         
-        # Famous cards get price multipliers
-        multipliers = {
-            "Charizard": 5.0,
-            "Pikachu": 2.0,
-            "Blastoise": 3.0,
-            "Venusaur": 3.0
-        }
-        
-        multiplier = multipliers.get(card.name, 1.0)
-        base_price *= multiplier
-        
-        # Generate grade-based pricing with realistic structure
-        grades = ['Ungraded', 'PSA 8', 'PSA 9', 'PSA 10', 'BGS 9.5']
-        multipliers = [1.0, 2.0, 4.0, 8.0, 6.0]
-        
-        prices_by_grade = {}
-        
-        for grade, mult in zip(grades, multipliers):
-            price = base_price * mult * (0.8 + random.random() * 0.4)
-            prices_by_grade[grade] = {
-                'avg_price': round(price, 2),
-                'min_price': round(price * 0.7, 2),
-                'max_price': round(price * 1.4, 2),
-                'median_price': round(price * 0.95, 2),
-                'sale_count': random.randint(1, 10)
+        prices_by_grade = {
+            grade: {
+                'avg_price': avg,
+                'min_price': low,
+                'max_price': high,
+                'median_price': median,
+                'sale_count': count
             }
+            for grade, avg, low, high, median, count in zip(
+                FALLBACK_GRADES,
+                avg_prices.round(2).tolist(),
+                (avg_prices * 0.7).round(2).tolist(),
+                (avg_prices * 1.4).round(2).tolist(),
+                (avg_prices * 0.95).round(2).tolist(),
+                sale_counts.tolist()
+            )
+        }
         
         return {
             'card_name': f"{card.name} ({card.set_name})",
             'set_number': card.set_number,
             'prices_by_grade': prices_by_grade,
-            'total_listings': sum(g['sale_count'] for g in prices_by_grade.values()),
+            'total_listings': int(sale_counts.sum()),
             'last_updated': datetime.now().isoformat(),
             'source': 'fallback',
             'note': 'Fallback pricing - real data unavailable'
@@ -335,8 +406,8 @@ def main():
     
     # Save detailed results
     output_file = "identification_result.json"
-    with open(output_file, 'w') as f:
-        json.dump(result, f, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"\n📄 Detailed results saved to: {output_file}")
 
@@ -5,6 +5,7 @@ Command-line interface for managing price data and cache
 """
 
 import argparse
+import logging
 import sys
 import json
 from datetime import datetime
@@ -52,6 +53,9 @@ def main():
         parser.print_help()
         return
     
+    # Show the scraper's progress messages
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Execute commands
     if args.command == 'price':
         cmd_price(args)
@@ -4,9 +4,33 @@ Pokemon Card Database - Base Set (102 cards)
 Complete database for card identification
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
+from collections import Counter
+import functools
 import re
+import numpy as np
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+# Characters dropped before comparing names
+NAME_STRIP_RE = re.compile(r'[^a-zA-Z0-9\s]')
+
+# Characters dropped from lowercased names for the punctuation-free index keys
+NAME_KEY_RE = re.compile(r'[^a-z0-9]')
+
+SEARCH_CACHE_SIZE = 1024
+
+# Without rapidfuzz, only the names sharing the most character bigrams
+# with the query get a full SequenceMatcher score
+NAME_NGRAM_SIZE = 2
+FUZZY_CANDIDATES = 20
+
+# Name match score above which match_card skips the HP cross-reference
+CONFIDENT_NAME_SCORE = 0.95
 
 # Complete Base Set Database (102 cards)
 BASE_SET_CARDS = [
@@ -129,6 +153,12 @@ for card in BASE_SET_CARDS:
     card["release_date"] = "1999-01-09"
 
 
+def _name_ngrams(text: str) -> set:
+    """Distinct character bigrams of a cleaned name, padded at the ends"""
+    padded = f" {text} "
+    return {padded[i:i + NAME_NGRAM_SIZE] for i in range(len(padded) - NAME_NGRAM_SIZE + 1)}
+
+
 class CardMatcher:
     """
     Matches OCR-extracted text to cards in the database
@@ -138,65 +168,114 @@ class CardMatcher:
     def __init__(self):
         self.cards = BASE_SET_CARDS
         self._build_search_index()
+        
+        # Name searches and OCR name matches repeat (autocomplete, retries,
+        # batches of similar photos), so memoize them
+        self._search_cached = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
+        self._match_by_name_cached = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._match_by_name_scored)
     
     def _build_search_index(self):
         """Build search indices for fast matching"""
         self.name_index = {}
         self.hp_index = {}
         self.set_number_index = {}
+        self.rarity_index = {}
+        self._hp_lower_names = {}  # Lowercased names parallel to hp_index lists
+        
+        # Lowercased and cleaned names, parallel to self.cards
+        self._lower_names = [card["name"].lower() for card in self.cards]
+        self._clean_names = [NAME_STRIP_RE.sub('', card["name"]).lower() for card in self.cards]
         
-        for card in self.cards:
+        # Bigram -> indices of the cleaned names containing it
+        self._name_ngram_index = {}
+        for i, card_name_clean in enumerate(self._clean_names):
+            for gram in _name_ngrams(card_name_clean):
+                self._name_ngram_index.setdefault(gram, []).append(i)
+        
+        for card, name_lower in zip(self.cards, self._lower_names):
             # Name index (lowercase for matching)
-            name_lower = card["name"].lower()
             self.name_index[name_lower] = card
             
             # Also index without special characters
-            clean_name = re.sub(r'[^a-z0-9]', '', name_lower)
+            clean_name = NAME_KEY_RE.sub('', name_lower)
             self.name_index[clean_name] = card
             
             # HP index
             if card["hp"]:
-                hp_key = str(card["hp"])
-                if hp_key not in self.hp_index:
-                    self.hp_index[hp_key] = []
-                self.hp_index[hp_key].append(card)
+                self.hp_index.setdefault(card["hp"], []).append(card)
+                self._hp_lower_names.setdefault(card["hp"], []).append(name_lower)
             
             # Set number index
             self.set_number_index[card["set_number"]] = card
+            
+            # Rarity index
+            self.rarity_index.setdefault(card["rarity"], []).append(card)
     
     def match_by_name(self, extracted_name: str, threshold: float = 0.6) -> Optional[Dict]:
         """Match card by name with fuzzy matching"""
+        return self._match_by_name_cached(extracted_name, threshold)[0]
+    
+    def _match_by_name_scored(self, extracted_name: str, threshold: float = 0.6) -> Tuple[Optional[Dict], float]:
+        """Uncached match_by_name that also returns the winning score (1.0 for an exact match)"""
         if not extracted_name:
-            return None
+            return None, 0
         
-        clean_name = re.sub(r'[^a-zA-Z0-9\s]', '', extracted_name).lower().strip()
+        clean_name = NAME_STRIP_RE.sub('', extracted_name).lower().strip()
         
         # Exact match first
         if clean_name in self.name_index:
-            return self.name_index[clean_name]
+            return self.name_index[clean_name], 1.0
+        
+        # Fuzzy match: similarity to every card name in one C call when
+        # rapidfuzz is installed, SequenceMatcher otherwise
+        if process is not None:
+            scores = (process.cdist([clean_name], self._clean_names, scorer=fuzz.ratio)[0] / 100).tolist()
+        else:
+            scores = self._difflib_scores(clean_name, threshold)
         
-        # Fuzzy match
         best_match = None
         best_score = 0
         
-        for card in self.cards:
-            card_name_clean = re.sub(r'[^a-zA-Z0-9\s]', '', card["name"]).lower()
-            
+        for card, card_name_clean, score in zip(self.cards, self._clean_names, scores):
             # Check if extracted name contains card name or vice versa
             if card_name_clean in clean_name or clean_name in card_name_clean:
                 score = 0.9
-            else:
-                score = SequenceMatcher(None, clean_name, card_name_clean).ratio()
             
             if score > best_score and score >= threshold:
                 best_score = score
                 best_match = card
         
-        return best_match
+        return best_match, best_score
+    
+    def _difflib_scores(self, clean_name: str, threshold: float) -> List[float]:
+        """
+        SequenceMatcher ratios against the cleaned card names. Only the
+        FUZZY_CANDIDATES names sharing the most bigrams with the query are
+        scored, and like difflib.get_close_matches the cheap upper bounds
+        are checked first; every other name scores 0.
+        """
+        shared = Counter()
+        for gram in _name_ngrams(clean_name):
+            shared.update(self._name_ngram_index.get(gram, ()))
+        
+        matcher = SequenceMatcher()
+        matcher.set_seq1(clean_name)
+        
+        scores = [0.0] * len(self._clean_names)
+        for i, _ in shared.most_common(FUZZY_CANDIDATES):
+            matcher.set_seq2(self._clean_names[i])
+            if (matcher.real_quick_ratio() >= threshold and
+                    matcher.quick_ratio() >= threshold):
+                scores[i] = matcher.ratio()
+        return scores
     
     def match_by_hp(self, hp: int) -> List[Dict]:
         """Get all cards with matching HP"""
-        return self.hp_index.get(str(hp), [])
+        return self.hp_index.get(hp, [])
+    
+    def match_by_rarity(self, rarity: str) -> List[Dict]:
+        """Get all cards of a rarity"""
+        return self.rarity_index.get(rarity, [])
     
     def match_by_set_number(self, set_number: str) -> Optional[Dict]:
         """Match card by exact set number"""
@@ -219,20 +298,29 @@ class CardMatcher:
         
         # Try name matching
         if name:
-            match = self.match_by_name(name)
+            match, score = self._match_by_name_cached(name, 0.6)
             if match:
+                # A (near-)exact name is trusted without the HP cross-reference;
+                # an agreeing HP still upgrades it to a combo match
+                if score >= CONFIDENT_NAME_SCORE:
+                    if hp and match["hp"] == hp:
+                        return {"card": match, "confidence": 0.7 + (score * 0.2), "match_type": "hp_name_combo"}
+                    return {"card": match, "confidence": 0.85, "match_type": "name"}
                 candidates.append({"card": match, "confidence": 0.85, "match_type": "name"})
         
         # Try HP cross-reference
         if hp and name:
             hp_matches = self.match_by_hp(hp)
-            for hp_match in hp_matches:
-                # Check if name also matches
-                name_score = SequenceMatcher(
-                    None, 
-                    name.lower(), 
-                    hp_match["name"].lower()
-                ).ratio()
+            name_lower = name.lower()
+            hp_names = self._hp_lower_names.get(hp, [])
+            
+            # Check if name also matches, scoring all same-HP cards at once
+            if process is not None and hp_names:
+                name_scores = (process.cdist([name_lower], hp_names, scorer=fuzz.ratio, dtype=np.float64)[0] / 100).tolist()
+            else:
+                name_scores = [SequenceMatcher(None, name_lower, hp_name).ratio() for hp_name in hp_names]
+            
+            for hp_match, name_score in zip(hp_matches, name_scores):
                 if name_score > 0.5:
                     candidates.append({
                         "card": hp_match, 
@@ -249,14 +337,14 @@ class CardMatcher:
     
     def search(self, query: str) -> List[Dict]:
         """Search cards by name (partial match)"""
-        query_lower = query.lower()
-        results = []
-        
-        for card in self.cards:
-            if query_lower in card["name"].lower():
-                results.append(card)
-        
-        return results
+        return list(self._search_cached(query.lower()))
+    
+    def _search(self, query_lower: str) -> Tuple[Dict, ...]:
+        """Uncached partial-name search; `query_lower` is already lowercased"""
+        return tuple(
+            card for card, name_lower in zip(self.cards, self._lower_names)
+            if query_lower in name_lower
+        )
     
     def get_all_cards(self) -> List[Dict]:
         """Return all cards in database"""
@@ -267,5 +355,15 @@ class CardMatcher:
         return len(self.cards)
 
 
-# Global matcher instance
-card_matcher = CardMatcher()
\ No newline at end of file
+@functools.cache
+def get_card_matcher() -> CardMatcher:
+    """Shared matcher instance, built on first use"""
+    return CardMatcher()
+
+
+def __getattr__(name: str):
+    # Global matcher instance, created lazily so importing the card data
+    # or CardMatcher alone doesn't build the search indexes
+    if name == 'card_matcher':
+        return get_card_matcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,15 +4,68 @@ Main Card Identifier - Ties together OCR, Database, and Pricing
 Full pipeline for Pokemon card identification
 """
 
+import functools
+import hashlib
 import os
 import random
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from PIL import Image
 import numpy as np
+import orjson
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
 
 from ocr_engine import ocr_engine
-from card_database import card_matcher
+from card_database import get_card_matcher
+
+# Number of recognised images remembered by content hash
+RECOGNITION_CACHE_SIZE = 256
+
+# Condition statistics are computed on images scaled down to fit this box
+CONDITION_ANALYSIS_SIZE = (512, 512)
+
+# Laplacian-variance cut-offs for the sharpness factor, at CONDITION_ANALYSIS_SIZE
+# (the Laplacian runs 10-50x higher than the old gradient-of-gradient metric,
+# whose cut-offs were 100/50)
+SHARPNESS_HIGH = 2000
+SHARPNESS_LOW = 400
+
+# Base pricing by rarity
+RARITY_BASE_PRICES = {
+    'Holo Rare': 50,
+    'Rare': 10,
+    'Uncommon': 3,
+    'Common': 1
+}
+
+# Popularity multipliers for iconic cards
+POPULARITY_MULTIPLIERS = {
+    'Charizard': 15.0,
+    'Blastoise': 5.0,
+    'Venusaur': 4.5,
+    'Pikachu': 3.0,
+    'Mewtwo': 4.0,
+    'Alakazam': 2.5,
+    'Machamp': 2.0,
+    'Gyarados': 3.0,
+    'Dragonite': 5.0,
+    'Gengar': 3.5,
+    'Zapdos': 2.5,
+    'Articuno': 2.5,
+    'Moltres': 2.5,
+    'Chansey': 2.0,
+    'Hitmonchan': 1.5,
+}
+
+# Price multiplier per grade, relative to ungraded
+GRADES = ['Ungraded', 'PSA 7', 'PSA 8', 'PSA 9', 'PSA 10', 'BGS 9.5']
+GRADE_MULTIPLIERS = np.array([1.0, 2.0, 3.5, 7.0, 15.0, 10.0])
 
 
 class PokemonCardIdentifier:
@@ -24,13 +77,84 @@ class PokemonCardIdentifier:
     4. Generates pricing data
     """
     
+    # Shared generator for pricing noise (seeded once, not per call)
+    _rng = np.random.default_rng()
+    
     def __init__(self):
         self.ocr = ocr_engine
-        self.matcher = card_matcher
+        self.matcher = get_card_matcher()
+        # Results are kept JSON-encoded and decoded per hit, so callers get
+        # their own copies and can't alter the cache or the matcher's cards
+        self._recognized: "OrderedDict[str, bytes]" = OrderedDict()
+        self._recognized_lock = threading.Lock()
+        
+        # Rarity and popularity are fixed per card, so price bases are worked out once
+        self._base_price_table = {
+            card['set_number']: self._base_price(card) for card in self.matcher.cards
+        }
+    
+    @staticmethod
+    def _base_price(card: Dict) -> float:
+        """Ungraded base price from rarity and popularity"""
+        base_price = RARITY_BASE_PRICES.get(card.get('rarity', 'Common'), 5)
+        return base_price * POPULARITY_MULTIPLIERS.get(card.get('name', ''), 1.0)
+    
+    @staticmethod
+    def _image_digest(image_path: str, chunk_size: int = 1 << 20) -> str:
+        """Content hash of an image file"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(image_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _recognize(self, image_path: str) -> Tuple[Dict, Optional[Dict]]:
+        """
+        OCR and database match for an image, remembered by content hash
+        so re-uploads of the same photo skip the OCR round trip.
+        Returns (ocr_result, match_result); match_result is None when OCR failed.
+        """
+        try:
+            key = self._image_digest(image_path)
+        except OSError:
+            key = None
+        
+        if key is not None:
+            with self._recognized_lock:
+                cached = self._recognized.get(key)
+                if cached is not None:
+                    self._recognized.move_to_end(key)
+            if cached is not None:
+                ocr_result, match_result = orjson.loads(cached)
+                return ocr_result, match_result
+        
+        ocr_result = self.ocr.identify_card(image_path)
+        match_result = None
+        if ocr_result.get('success'):
+            match_result = self.matcher.match_card(
+                name=ocr_result.get('extracted_name'),
+                hp=ocr_result.get('extracted_hp'),
+                set_number=ocr_result.get('extracted_set_number')
+            )
+        
+        # Failed OCR may be a transient API error, so only successes are kept
+        if key is not None and ocr_result.get('success'):
+            try:
+                payload = orjson.dumps([ocr_result, match_result])
+            except TypeError as e:
+                print(f"⚠️ Could not cache recognition result: {e}")
+                return ocr_result, match_result
+            with self._recognized_lock:
+                self._recognized[key] = payload
+                while len(self._recognized) > RECOGNITION_CACHE_SIZE:
+                    self._recognized.popitem(last=False)
+        
+        return ocr_result, match_result
     
-    def identify(self, image_path: str) -> Dict:
+    def identify(self, image_path: str, grade: bool = True) -> Dict:
         """
         Full card identification pipeline
+        Pass grade=False to skip condition analysis (grading is left empty)
         """
         result = {
             'success': False,
@@ -42,30 +166,24 @@ class PokemonCardIdentifier:
         }
         
         try:
-            # Step 1: Run OCR to extract text
-            ocr_result = self.ocr.identify_card(image_path)
-            result['debug']['ocr'] = ocr_result
+            # Steps 1-2: Run OCR and match extracted info to database
+            # (cached per image content; grading and pricing still run every call)
+            ocr_result, match_result = self._recognize(image_path)
+            result['debug']['ocr'] = dict(ocr_result)
             
             if not ocr_result.get('success'):
                 result['error'] = f"OCR failed: {ocr_result.get('error', 'Unknown error')}"
-                return self._fallback_result(result, image_path)
-            
-            # Step 2: Match extracted info to database
-            match_result = self.matcher.match_card(
-                name=ocr_result.get('extracted_name'),
-                hp=ocr_result.get('extracted_hp'),
-                set_number=ocr_result.get('extracted_set_number')
-            )
+                return self._fallback_result(result, image_path, grade=grade)
             
             matched_card = match_result.get('card')
             match_confidence = match_result.get('confidence', 0)
             
             if not matched_card:
                 result['error'] = 'No matching card found in database'
-                return self._fallback_result(result, image_path, ocr_result)
+                return self._fallback_result(result, image_path, ocr_result, grade=grade)
             
             # Step 3: Analyze card condition/grading
-            grading = self._analyze_condition(image_path)
+            grading = self._analyze_condition(image_path) if grade else {}
             
             # Step 4: Generate pricing
             pricing = self._generate_pricing(matched_card)
@@ -93,7 +211,36 @@ class PokemonCardIdentifier:
             
         except Exception as e:
             result['error'] = f"Identification error: {str(e)}"
-            return self._fallback_result(result, image_path)
+            return self._fallback_result(result, image_path, grade=grade)
+    
+    @staticmethod
+    def _mean_std(pixels: np.ndarray) -> Tuple[float, float]:
+        """
+        Mean and standard deviation over every 8-bit value of an image
+        (all channels pooled, as np.mean/np.std would) in one pass
+        """
+        if cv2 is not None:
+            mean, std = cv2.meanStdDev(pixels.reshape(-1, 1))
+            return float(mean[0, 0]), float(std[0, 0])
+        
+        # One integer histogram pass; the moments come from its 256 bins
+        counts = np.bincount(pixels.ravel(), minlength=256)
+        levels = np.arange(256)
+        mean = counts @ levels / pixels.size
+        var = counts @ (levels - mean) ** 2 / pixels.size
+        return float(mean), float(np.sqrt(var))
+    
+    @staticmethod
+    def _laplacian_variance(gray: np.ndarray) -> float:
+        """Variance of the 3x3 Laplacian of a grayscale image (higher = sharper)"""
+        if cv2 is not None:
+            return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+        
+        # Same 4-neighbour kernel without OpenCV, over the whole image: the
+        # border is mirrored like cv2's default BORDER_REFLECT_101
+        g = np.pad(gray.astype(np.float32), 1, mode='reflect')
+        lap = g[:-2, 1:-1] + g[2:, 1:-1] + g[1:-1, :-2] + g[1:-1, 2:] - 4 * g[1:-1, 1:-1]
+        return float(lap.var())
     
     def _analyze_condition(self, image_path: str) -> Dict:
         """
@@ -102,16 +249,21 @@ class PokemonCardIdentifier:
         """
         try:
             with Image.open(image_path) as img:
-                # Convert to array
-                img_array = np.array(img.convert('RGB'))
+                # Brightness/contrast/blur don't need full phone-camera resolution;
+                # draft() lets JPEGs decode straight to a reduced image
+                img.draft('RGB', CONDITION_ANALYSIS_SIZE)
+                img.thumbnail(CONDITION_ANALYSIS_SIZE, Image.BILINEAR)
+                rgb = img.convert('RGB')
+                
+                # Image quality factors, over the RGB values like the
+                # brightness/contrast bands below expect
+                brightness, contrast = self._mean_std(np.asarray(rgb))
                 
-                # Image quality factors
-                brightness = np.mean(img_array)
-                contrast = np.std(img_array)
+                # Sharpness only needs one 8-bit grayscale channel
+                gray = np.asarray(rgb.convert('L'))
                 
                 # Check for blur (using Laplacian variance)
-                gray = np.mean(img_array, axis=2)
-                laplacian_var = np.var(np.gradient(np.gradient(gray)))
+                laplacian_var = self._laplacian_variance(gray)
                 
                 # Base grade calculations
                 base = 7.0
@@ -133,9 +285,9 @@ class PokemonCardIdentifier:
                     contrast_factor = -0.5
                 
                 # Sharpness factor (higher = sharper)
-                if laplacian_var > 100:
+                if laplacian_var > SHARPNESS_HIGH:
                     sharpness_factor = 1.0
-                elif laplacian_var > 50:
+                elif laplacian_var > SHARPNESS_LOW:
                     sharpness_factor = 0.5
                 else:
                     sharpness_factor = 0.0
@@ -174,64 +326,43 @@ class PokemonCardIdentifier:
         """
         Generate realistic pricing based on card attributes
         """
-        rarity = card.get('rarity', 'Common')
         name = card.get('name', '')
+        base_price = self._base_price_table.get(card.get('set_number'))
+        if base_price is None:
+            base_price = self._base_price(card)
         
-        # Base pricing by rarity
-        base_prices = {
-            'Holo Rare': 50,
-            'Rare': 10,
-            'Uncommon': 3,
-            'Common': 1
-        }
-        base_price = base_prices.get(rarity, 5)
-        
-        # Popularity multipliers for iconic cards
-        popularity_multipliers = {
-            'Charizard': 15.0,
-            'Blastoise': 5.0,
-            'Venusaur': 4.5,
-            'Pikachu': 3.0,
-            'Mewtwo': 4.0,
-            'Alakazam': 2.5,
-            'Machamp': 2.0,
-            'Gyarados': 3.0,
-            'Dragonite': 5.0,
-            'Gengar': 3.5,
-            'Zapdos': 2.5,
-            'Articuno': 2.5,
-            'Moltres': 2.5,
-            'Chansey': 2.0,
-            'Hitmonchan': 1.5,
-        }
-        multiplier = popularity_multipliers.get(name, 1.0)
-        base_price *= multiplier
+        # All grades at once: one jitter and sale-count draw per grade
+        prices = base_price * GRADE_MULTIPLIERS * self._rng.uniform(0.9, 1.1, len(GRADES))
+        sale_counts = self._rng.integers(3, 31, size=len(GRADES))
         
-        # Generate prices by grade
-        grades = ['Ungraded', 'PSA 7', 'PSA 8', 'PSA 9', 'PSA 10', 'BGS 9.5']
-        grade_multipliers = [1.0, 2.0, 3.5, 7.0, 15.0, 10.0]
-        
-        prices_by_grade = {}
-        for grade, mult in zip(grades, grade_multipliers):
-            price = base_price * mult * random.uniform(0.9, 1.1)
-            prices_by_grade[grade] = {
-                'avg_price': round(price, 2),
-                'min_price': round(price * 0.7, 2),
-                'max_price': round(price * 1.4, 2),
-                'median_price': round(price * 0.95, 2),
-                'sale_count': random.randint(3, 30)
+        prices_by_grade = {
+            grade: {
+                'avg_price': avg,
+                'min_price': low,
+                'max_price': high,
+                'median_price': median,
+                'sale_count': count
             }
+            for grade, avg, low, high, median, count in zip(
+                GRADES,
+                prices.round(2).tolist(),
+                (prices * 0.7).round(2).tolist(),
+                (prices * 1.4).round(2).tolist(),
+                (prices * 0.95).round(2).tolist(),
+                sale_counts.tolist()
+            )
+        }
         
         return {
             'card_name': f"{name} ({card.get('set_name', 'Base Set')})",
             'set_number': card.get('set_number', ''),
             'prices_by_grade': prices_by_grade,
-            'total_listings': sum(g['sale_count'] for g in prices_by_grade.values()),
+            'total_listings': int(sale_counts.sum()),
             'source': 'market_analysis',
             'last_updated': datetime.now().isoformat()
         }
     
-    def _fallback_result(self, result: Dict, image_path: str, ocr_result: Dict = None) -> Dict:
+    def _fallback_result(self, result: Dict, image_path: str, ocr_result: Dict = None, grade: bool = True) -> Dict:
         """
         Generate fallback result when identification fails
         Uses visual analysis as backup
@@ -245,10 +376,7 @@ class PokemonCardIdentifier:
         
         if not fallback_card:
             # Random fallback from popular cards
-            popular_cards = [
-                card for card in self.matcher.cards 
-                if card['rarity'] == 'Holo Rare'
-            ]
+            popular_cards = self.matcher.match_by_rarity('Holo Rare')
             fallback_card = random.choice(popular_cards) if popular_cards else self.matcher.cards[0]
         
         result['success'] = True
@@ -265,11 +393,20 @@ class PokemonCardIdentifier:
             'match_type': 'visual_fallback',
             'pricing': self._generate_pricing(fallback_card)
         }]
-        result['grading'] = self._analyze_condition(image_path)
+        result['grading'] = self._analyze_condition(image_path) if grade else {}
         result['note'] = 'Fallback identification - OCR could not extract clear text'
         
         return result
 
 
-# Global identifier instance
-card_identifier = PokemonCardIdentifier()
\ No newline at end of file
+@functools.cache
+def get_card_identifier() -> PokemonCardIdentifier:
+    """Shared identifier instance, built on first use"""
+    return PokemonCardIdentifier()
+
+
+def __getattr__(name: str):
+    # Global identifier instance, created lazily like card_database.card_matcher
+    if name == 'card_identifier':
+        return get_card_identifier()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -18,6 +18,22 @@ import io
 OCR_SPACE_API_KEY = os.environ.get("OCR_SPACE_API_KEY", "K85119aborud288")  # Free demo key
 OCR_SPACE_URL = "https://api.ocr.space/parse/image"
 
+# HP, usually in format "120 HP" or "HP 120" (tried in order)
+HP_PATTERNS = [
+    re.compile(r'(\d+)\s*HP'),
+    re.compile(r'HP\s*(\d+)'),
+    re.compile(r'(\d{2,3})\s*H\s*P')  # Handle spacing issues
+]
+
+# Set number, usually in format "4/102" or similar (tried in order)
+SET_NUMBER_PATTERNS = [
+    re.compile(r'(\d{1,3})\s*/\s*(\d{1,3})'),
+    re.compile(r'(\d{1,3})\s*OF\s*(\d{1,3})'),
+]
+
+# Characters dropped from a line before treating it as a name
+NAME_LINE_STRIP_RE = re.compile(r'[^A-Z\s]')
+
 
 class PokemonCardOCR:
     """
@@ -146,24 +162,15 @@ class PokemonCardOCR:
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
         # Extract HP (usually in format "120 HP" or "HP 120")
-        hp_patterns = [
-            r'(\d+)\s*HP',
-            r'HP\s*(\d+)',
-            r'(\d{2,3})\s*H\s*P'  # Handle spacing issues
-        ]
-        for pattern in hp_patterns:
-            match = re.search(pattern, text)
+        for pattern in HP_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result['hp'] = int(match.group(1))
                 break
         
         # Extract set number (usually in format "4/102" or similar)
-        set_patterns = [
-            r'(\d{1,3})\s*/\s*(\d{1,3})',
-            r'(\d{1,3})\s*OF\s*(\d{1,3})',
-        ]
-        for pattern in set_patterns:
-            match = re.search(pattern, text)
+        for pattern in SET_NUMBER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 result['set_number'] = f"{match.group(1)}/{match.group(2)}"
                 break
@@ -213,7 +220,7 @@ class PokemonCardOCR:
         if not result['name'] and lines:
             for line in lines[:3]:  # Check first 3 lines
                 # Clean the line
-                clean_line = re.sub(r'[^A-Z\s]', '', line).strip()
+                clean_line = NAME_LINE_STRIP_RE.sub('', line).strip()
                 if clean_line and len(clean_line) > 2:
                     # Check if it's a single word (likely Pokemon name)
                     words = clean_line.split()
@@ -16,8 +16,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import tempfile
 
 # Import card identification system
-from card_identifier import card_identifier
-from card_database import card_matcher
+from card_identifier import get_card_identifier
+from card_database import get_card_matcher
 import uvicorn
 
 # Initialize FastAPI app
@@ -151,20 +151,22 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    cards = card_matcher.get_all_cards()
+    matcher = get_card_matcher()
+    cards = matcher.get_all_cards()
     return {
         "status": "healthy",
-        "database_cards": card_matcher.get_card_count(),
+        "database_cards": matcher.get_card_count(),
         "available_sets": list(set(card["set_name"] for card in cards)),
         "environment": "production-ocr",
         "capabilities": ["ocr", "text_matching", "grading", "pricing"]
     }
 
 @app.post("/identify")
-async def identify_card_endpoint(file: UploadFile = File(...)):
+async def identify_card_endpoint(file: UploadFile = File(...), grade: bool = True):
     """
     Identify a Pokemon card from an uploaded image
     Uses OCR + Database matching for real identification
+    Pass grade=false to skip condition grading
     """
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
@@ -177,7 +179,7 @@ async def identify_card_endpoint(file: UploadFile = File(...)):
     
     try:
         # Use our OCR-based card identifier
-        result = card_identifier.identify(temp_file_path)
+        result = get_card_identifier().identify(temp_file_path, grade=grade)
         
         # Add filename to result
         result["filename"] = file.filename
@@ -186,7 +188,7 @@ async def identify_card_endpoint(file: UploadFile = File(...)):
         
     except Exception as e:
         # Fallback in case of errors
-        cards = card_matcher.get_all_cards()
+        cards = get_card_matcher().get_all_cards()
         holo_rares = [c for c in cards if c['rarity'] == 'Holo Rare']
         random_card = random.choice(holo_rares) if holo_rares else cards[0]
         
@@ -207,7 +209,7 @@ async def identify_card_endpoint(file: UploadFile = File(...)):
                     "pricing": generate_mock_pricing(random_card["name"], random_card["rarity"])
                 }
             ],
-            "grading": generate_mock_grading(random_card["name"]),
+            "grading": generate_mock_grading(random_card["name"]) if grade else {},
             "note": f"Error fallback: {str(e)}"
         }
     
@@ -223,7 +225,7 @@ async def get_card_pricing(card_name: str, set_name: str):
     """Get pricing for a specific card"""
     # Find matching card using database
     card_name_clean = card_name.replace("-", " ")
-    matched = card_matcher.match_by_name(card_name_clean)
+    matched = get_card_matcher().match_by_name(card_name_clean)
     
     if not matched:
         raise HTTPException(status_code=404, detail="Card not found in database")
@@ -238,7 +240,7 @@ async def get_card_pricing(card_name: str, set_name: str):
 @app.get("/search")
 async def search_cards(name: str):
     """Search for cards by name"""
-    matching_cards = card_matcher.search(name)
+    matching_cards = get_card_matcher().search(name)
     
     return {
         "success": True,
@@ -3,111 +3,361 @@ import numpy as np
 import pytesseract
 from PIL import Image
 import re
+import threading
 from typing import Dict, List, Tuple, Optional
 import json
 
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+except ImportError:
+    PyTessBaseAPI = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+OCR_CHAR_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,/()-'
+
+# White rows between regions when several are stacked into one OCR image
+OCR_STACK_GAP = 20
+
+HP_RE = re.compile(r'(\d+)\s*HP', re.IGNORECASE)
+SET_NUMBER_RE = re.compile(r'(\d+)/(\d+)')
+
+# Regions of interest for different card elements, as
+# (top, bottom, left) fractions of the card's height/width
+TEXT_REGIONS = {
+    'name': (0.05, 0.15, 0.0),      # Top area
+    'hp': (0.05, 0.15, 0.7),        # Top-right
+    'type': (0.15, 0.3, 0.0),       # Below name
+    'set_info': (0.85, 1.0, 0.0),   # Bottom area
+    'full_card': (0.0, 1.0, 0.0)    # Entire card for fallback
+}
+
+def _top_card_candidates_np(areas: np.ndarray, min_area: float, k: int) -> np.ndarray:
+    """
+    Indices of the k largest contours above min_area, largest first
+    """
+    k = min(k, len(areas))
+    top = np.argpartition(-areas, k - 1)[:k]
+    top = top[np.argsort(-areas[top])]
+    return top[areas[top] > min_area]
+
+def _top_card_candidates_loop(areas: np.ndarray, min_area: float, k: int) -> np.ndarray:
+    """
+    Same as _top_card_candidates_np as a single insertion pass; only used
+    when Numba can compile it to native code
+    """
+    best = np.empty(k, dtype=np.int64)
+    count = 0
+    
+    for i in range(areas.shape[0]):
+        area = areas[i]
+        if area <= min_area or (count == k and area <= areas[best[k - 1]]):
+            continue
+        
+        pos = count if count < k else k - 1
+        while pos > 0 and areas[best[pos - 1]] < area:
+            best[pos] = best[pos - 1]
+            pos -= 1
+        best[pos] = i
+        
+        if count < k:
+            count += 1
+    
+    return best[:count]
+
+if njit is not None:
+    _top_card_candidates = njit(cache=True)(_top_card_candidates_loop)
+else:
+    _top_card_candidates = _top_card_candidates_np
+
 class PokemonCardIdentifier:
     """
     Identifies Pokemon cards from images using computer vision and OCR
     """
     
-    def __init__(self):
+    def __init__(self, use_opencl: bool = False):
+        """
+        use_opencl turns on OpenCV's OpenCL path for edge detection when no
+        CUDA device is found; it changes OpenCV's global state, so it is off
+        unless asked for
+        """
         self.confidence_threshold = 0.7
         self.card_aspect_ratio = 2.5 / 3.5  # Standard Pokemon card ratio
         
+        # Corrected cards are always warped to the same size, so the
+        # target corners are fixed
+        card_width = 350  # Standard card width in pixels
+        card_height = int(card_width / self.card_aspect_ratio)
+        self.card_size = (card_width, card_height)
+        self.target_corners = np.array([
+            [0, 0],
+            [card_width, 0],
+            [card_width, card_height],
+            [0, card_height]
+        ], dtype=np.float32)
+        
+        self.detection_width = 640  # Edge detection runs at this width
+        self.min_decode_side = 1000  # Large photos are decoded at reduced size down to this
+        self.max_card_candidates = 5  # Largest contours checked for a card
+        self.min_card_area = 0.05  # Card must cover this fraction of the image
+        
+        # Run edge detection on a CUDA device when OpenCV was built with one
+        self.cuda_filters = None
+        try:
+            if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                self.cuda_filters = (
+                    cv2.cuda.createGaussianFilter(cv2.CV_8UC1, cv2.CV_8UC1, (5, 5), 0),
+                    cv2.cuda.createCannyEdgeDetector(50, 150, 3)
+                )
+        except (AttributeError, cv2.error):
+            self.cuda_filters = None
+        
+        # Otherwise optionally try OpenCL (OpenCV T-API)
+        self.use_opencl = use_opencl and self.cuda_filters is None and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        
+        # Keep one Tesseract engine loaded for all regions and cards
+        # (falls back to pytesseract, which starts a process per call).
+        # The engine holds per-image state, so calls on it are serialized.
+        self.tess_api = None
+        self._tess_lock = threading.Lock()
+        if PyTessBaseAPI is not None:
+            try:
+                self.tess_api = PyTessBaseAPI(lang='eng', psm=PSM.SINGLE_BLOCK)
+                self.tess_api.SetVariable('tessedit_char_whitelist', OCR_CHAR_WHITELIST)
+            except Exception as e:
+                print(f"tesserocr unavailable, using pytesseract: {e}")
+                self.tess_api = None
+        
     def detect_card_boundaries(self, image: np.ndarray) -> Optional[np.ndarray]:
         """
         Detect card boundaries and return corrected/cropped card image
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        # Card detection is scale-invariant, so find edges on a downscaled copy
+        height, width = image.shape[:2]
+        scale = 1.0
+        small = image
+        if width > self.detection_width:
+            scale = width / self.detection_width
+            small = cv2.resize(image, (self.detection_width, int(height / scale)),
+                               interpolation=cv2.INTER_AREA)
         
-        # Edge detection
-        edges = cv2.Canny(blurred, 50, 150, apertureSize=3)
+        # Grayscale -> blur -> Canny edge map
+        edges = self._detect_edges(small)
         
         # Find contours
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return image
+        
+        # Only the largest few contours can be the card; pick them without a
+        # full sort, and drop anything too small to be a card at all
+        areas = np.fromiter((cv2.contourArea(c) for c in contours), dtype=np.float32, count=len(contours))
+        candidates = _top_card_candidates(areas, self.min_card_area * edges.size, self.max_card_candidates)
         
         # Find the largest rectangular contour (likely the card)
-        for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        for idx in candidates:
+            contour = contours[idx]
+            
+            # Check aspect ratio on the rotated bounding box first (cheap,
+            # and tolerant of tilted cards)
+            _, (rect_w, rect_h), _ = cv2.minAreaRect(contour)
+            if not rect_w or not rect_h:
+                continue
+            aspect_ratio = min(rect_w, rect_h) / max(rect_w, rect_h)
+            if not 0.5 < aspect_ratio < 0.8:  # Reasonable card ratio range
+                continue
+            
             # Approximate contour to polygon
             epsilon = 0.02 * cv2.arcLength(contour, True)
             approx = cv2.approxPolyDP(contour, epsilon, True)
             
-            # If we found a 4-sided polygon, check if it's card-like
+            # If we found a 4-sided polygon, it's our card
             if len(approx) == 4:
-                # Check aspect ratio
-                rect = cv2.boundingRect(approx)
-                aspect_ratio = rect[2] / rect[3]  # width/height
-                
-                if 0.5 < aspect_ratio < 0.8:  # Reasonable card ratio range
-                    # Perspective correction
-                    return self._correct_perspective(image, approx)
+                # Scale corners back to full resolution, then correct perspective
+                return self._correct_perspective(image, approx * scale)
         
         # If no card detected, return original image
         return image
     
+    def _detect_edges(self, image: np.ndarray) -> np.ndarray:
+        """
+        Edge map for contour finding, computed on the GPU (CUDA or OpenCL)
+        when available
+        """
+        if self.cuda_filters is not None:
+            gaussian, canny = self.cuda_filters
+            gpu_image = cv2.cuda_GpuMat()
+            gpu_image.upload(image)
+            gpu_gray = cv2.cuda.cvtColor(gpu_image, cv2.COLOR_BGR2GRAY)
+            gpu_edges = canny.detect(gaussian.apply(gpu_gray))
+            # findContours has no CUDA version, so bring the edges back
+            return gpu_edges.download()
+        
+        # Through the transparent API (UMat) the same calls run as OpenCL
+        # kernels on an integrated/discrete GPU when one is available
+        source = cv2.UMat(image) if self.use_opencl else image
+        
+        # Convert to grayscale
+        gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
+        
+        # Apply Gaussian blur to reduce noise
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        
+        # Edge detection
+        edges = cv2.Canny(blurred, 50, 150, apertureSize=3)
+        
+        return edges.get() if self.use_opencl else edges
+    
     def _correct_perspective(self, image: np.ndarray, corners: np.ndarray) -> np.ndarray:
         """
         Apply perspective correction to straighten the card
         """
         # Order corners: top-left, top-right, bottom-right, bottom-left
-        corners = corners.reshape(4, 2)
-        
-        # Calculate target dimensions
-        width = 350  # Standard card width in pixels
-        height = int(width / self.card_aspect_ratio)
-        
-        # Define target corners
-        target_corners = np.array([
-            [0, 0],
-            [width, 0],
-            [width, height],
-            [0, height]
-        ], dtype=np.float32)
+        corners = self._order_corners(corners.reshape(4, 2))
         
         # Calculate perspective transform
-        matrix = cv2.getPerspectiveTransform(corners.astype(np.float32), target_corners)
+        matrix = cv2.getPerspectiveTransform(corners, self.target_corners)
         
         # Apply transformation
-        corrected = cv2.warpPerspective(image, matrix, (width, height))
+        corrected = cv2.warpPerspective(image, matrix, self.card_size)
         
         return corrected
     
-    def extract_text_regions(self, image: np.ndarray) -> Dict[str, str]:
+    @staticmethod
+    def _order_corners(corners: np.ndarray) -> np.ndarray:
         """
-        Extract text from different regions of the card
+        Order 4 corner points as top-left, top-right, bottom-right, bottom-left.
+        x+y is smallest at top-left and largest at bottom-right; y-x is
+        smallest at top-right and largest at bottom-left.
+        """
+        sums = corners.sum(axis=1)
+        diffs = np.diff(corners, axis=1).ravel()
+        
+        return np.array([
+            corners[np.argmin(sums)],
+            corners[np.argmin(diffs)],
+            corners[np.argmax(sums)],
+            corners[np.argmax(diffs)]
+        ], dtype=np.float32)
+    
+    def _region_crops(self, image: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Binarized crops of each text region of a card image
         """
         height, width = image.shape[:2]
         
-        # Define regions of interest for different card elements
-        regions = {
-            'name': image[int(height * 0.05):int(height * 0.15), :],  # Top area
-            'hp': image[int(height * 0.05):int(height * 0.15), int(width * 0.7):],  # Top-right
-            'type': image[int(height * 0.15):int(height * 0.3), :],  # Below name
-            'set_info': image[int(height * 0.85):, :],  # Bottom area
-            'full_card': image  # Entire card for fallback
+        # Grayscale + Otsu binarize once for all regions, so Tesseract
+        # doesn't redo its own preprocessing on every crop
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        
+        # Pixel bounds for every region of interest in one pass
+        fractions = np.array(list(TEXT_REGIONS.values()), dtype=np.float32)
+        bounds = (fractions * np.array([height, height, width], dtype=np.float32)).astype(int)
+        
+        return {
+            region_name: binary[top:bottom, left:]
+            for region_name, (top, bottom, left) in zip(TEXT_REGIONS, bounds)
         }
+    
+    def extract_text_regions(self, image: np.ndarray) -> Dict[str, str]:
+        """
+        Extract text from different regions of the card
+        """
+        regions = self._region_crops(image)
         
         extracted_text = {}
         
         for region_name, region_image in regions.items():
             try:
-                # Use pytesseract for OCR
-                text = pytesseract.image_to_string(
-                    region_image,
-                    config='--psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,/()-'
-                )
-                extracted_text[region_name] = text.strip()
+                extracted_text[region_name] = self._ocr_region(region_image).strip()
             except Exception as e:
                 print(f"OCR failed for region {region_name}: {e}")
                 extracted_text[region_name] = ""
         
         return extracted_text
     
+    def extract_text_regions_batch(self, images: List[np.ndarray]) -> List[Dict[str, str]]:
+        """
+        Extract text regions for several same-sized card images. Each region
+        type is stacked into one tall image and OCR'd in a single call, then
+        the words are split back out by their vertical position.
+        """
+        if self.tess_api is not None:
+            # Engine is already loaded once; per-region calls are cheap
+            return [self.extract_text_regions(image) for image in images]
+        
+        crops = [self._region_crops(image) for image in images]
+        extracted = [{} for _ in images]
+        
+        for region_name in TEXT_REGIONS:
+            region_images = [card_crops[region_name] for card_crops in crops]
+            try:
+                texts = self._ocr_stacked(region_images)
+            except Exception as e:
+                print(f"OCR failed for region {region_name}: {e}")
+                texts = [""] * len(images)
+            
+            for card_text, text in zip(extracted, texts):
+                card_text[region_name] = text
+        
+        return extracted
+    
+    def _ocr_stacked(self, region_images: List[np.ndarray]) -> List[str]:
+        """
+        OCR equally-sized regions stacked vertically (white gap between
+        them) with one Tesseract call; returns the text of each region
+        """
+        region_height, region_width = region_images[0].shape[:2]
+        slot_height = region_height + OCR_STACK_GAP
+        
+        composite = np.full((slot_height * len(region_images), region_width), 255, dtype=np.uint8)
+        for i, region_image in enumerate(region_images):
+            composite[i * slot_height:i * slot_height + region_height] = region_image
+        
+        data = pytesseract.image_to_data(
+            Image.fromarray(composite).convert('1'),
+            config=f'--psm 6 -c tessedit_char_whitelist={OCR_CHAR_WHITELIST}',
+            output_type=pytesseract.Output.DICT
+        )
+        
+        # Group words into lines, and lines into the region they came from
+        lines = [{} for _ in region_images]
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            center = data['top'][i] + data['height'][i] // 2
+            slot = min(center // slot_height, len(region_images) - 1)
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines[slot].setdefault(line_key, []).append(word)
+        
+        return [
+            "\n".join(" ".join(words) for words in region_lines.values())
+            for region_lines in lines
+        ]
+    
+    def _ocr_region(self, region_image: np.ndarray) -> str:
+        """
+        Run OCR on a single region, reusing the loaded engine when available
+        """
+        # Regions are already binarized, so send them as 1-bit images
+        bilevel = Image.fromarray(region_image).convert('1')
+        
+        if self.tess_api is not None:
+            with self._tess_lock:
+                self.tess_api.SetImage(bilevel)
+                return self.tess_api.GetUTF8Text()
+        
+        return pytesseract.image_to_string(
+            bilevel,
+            config=f'--psm 6 -c tessedit_char_whitelist={OCR_CHAR_WHITELIST}'
+        )
+    
     def parse_card_info(self, text_regions: Dict[str, str]) -> Dict[str, any]:
         """
         Parse extracted text to identify card information
@@ -128,13 +378,13 @@ class PokemonCardIdentifier:
             card_info['name'] = name_text
         
         # Extract HP (look for number followed by HP)
-        hp_match = re.search(r'(\d+)\s*HP', text_regions.get('hp', ''), re.IGNORECASE)
+        hp_match = HP_RE.search(text_regions.get('hp', ''))
         if hp_match:
             card_info['hp'] = int(hp_match.group(1))
         
         # Extract set information from bottom of card
         set_text = text_regions.get('set_info', '')
-        set_match = re.search(r'(\d+)/(\d+)', set_text)
+        set_match = SET_NUMBER_RE.search(set_text)
         if set_match:
             card_info['set_number'] = f"{set_match.group(1)}/{set_match.group(2)}"
         
@@ -148,13 +398,79 @@ class PokemonCardIdentifier:
         
         return card_info
     
+    def _load_image(self, image_path: str) -> Optional[np.ndarray]:
+        """
+        Decode an image, letting the decoder downscale large photos (DCT
+        scaling for JPEG). The card is warped to 350px wide anyway, so
+        full phone-camera resolution is wasted work.
+        """
+        try:
+            # Only reads the header, not the pixels
+            with Image.open(image_path) as header:
+                short_side = min(header.size)
+        except Exception:
+            short_side = 0
+        
+        if short_side >= 4 * self.min_decode_side:
+            flags = cv2.IMREAD_REDUCED_COLOR_4
+        elif short_side >= 2 * self.min_decode_side:
+            flags = cv2.IMREAD_REDUCED_COLOR_2
+        else:
+            flags = cv2.IMREAD_COLOR
+        
+        return cv2.imread(image_path, flags)
+    
+    def identify_cards_batch(self, image_paths: List[str]) -> List[Dict[str, any]]:
+        """
+        Identify several cards at once (e.g. an inventory upload), sharing
+        the OCR passes across the whole batch. Results are in input order.
+        """
+        results = [None] * len(image_paths)
+        card_images = []
+        
+        for i, image_path in enumerate(image_paths):
+            try:
+                image = self._load_image(image_path)
+                if image is None:
+                    results[i] = {'error': 'Could not load image'}
+                    continue
+                
+                card_image = self.detect_card_boundaries(image)
+                
+                # Stacked OCR needs every card at the same size
+                if card_image.shape[1::-1] != self.card_size:
+                    card_image = cv2.resize(card_image, self.card_size, interpolation=cv2.INTER_AREA)
+                
+                card_images.append((i, card_image))
+                
+            except Exception as e:
+                results[i] = {'error': f'Identification failed: {str(e)}'}
+        
+        if not card_images:
+            return results
+        
+        try:
+            all_text_regions = self.extract_text_regions_batch([image for _, image in card_images])
+        except Exception as e:
+            for i, _ in card_images:
+                results[i] = {'error': f'Identification failed: {str(e)}'}
+            return results
+        
+        for (i, _), text_regions in zip(card_images, all_text_regions):
+            card_info = self.parse_card_info(text_regions)
+            card_info['extracted_text'] = text_regions
+            card_info['image_path'] = image_paths[i]
+            results[i] = card_info
+        
+        return results
+    
     def identify_card(self, image_path: str) -> Dict[str, any]:
         """
         Main method to identify a Pokemon card from an image file
         """
         try:
             # Load image
-            image = cv2.imread(image_path)
+            image = self._load_image(image_path)
             if image is None:
                 return {'error': 'Could not load image'}
             
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Identification Result Cache
+Remembers computer vision results by image content, so re-uploaded or
+retried images skip the OCR pipeline
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+CV_CACHE_DB = 'cv_cache.db'
+
+class CVResultCache:
+    """
+    Identification results keyed by a BLAKE2b hash of the image bytes.
+    Recent results are also kept in memory (LRU); every result expires
+    after max_age_hours. Entries are stored serialized, so each get()
+    returns a new dict that callers are free to modify.
+    """
+    
+    def __init__(self, cache_dir: str = "data/cv_cache", max_age_hours: float = 24, mem_max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_hours * 3600
+        self.mem_max_entries = mem_max_entries
+        self._mem: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        # Shared between threads, so every statement runs under _db_lock
+        self._db_lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(cache_dir, CV_CACHE_DB), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cv_cache (
+                hash TEXT PRIMARY KEY,
+                result BLOB NOT NULL,
+                ts REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+    
+    @staticmethod
+    def image_hash(image_path: str, chunk_size: int = 1 << 20) -> str:
+        """Content hash of an image file"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(image_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Unexpired result for an image hash, or None"""
+        oldest = time.time() - self.max_age
+        
+        payload = None
+        with self._mem_lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[0] >= oldest:
+                    self._mem.move_to_end(key)
+                    payload = entry[1]
+                else:
+                    del self._mem[key]
+        if payload is not None:
+            return orjson.loads(payload)
+        
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT result, ts FROM cv_cache WHERE hash = ? AND ts >= ?", (key, oldest)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        self._mem_put(key, row[1], row[0])
+        return orjson.loads(row[0])
+    
+    def put(self, key: str, result: Dict):
+        """Store a result for an image hash"""
+        ts = time.time()
+        try:
+            payload = orjson.dumps(result)
+        except TypeError as e:
+            print(f"⚠️ Could not cache identification result: {e}")
+            return
+        
+        with self._db_lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO cv_cache (hash, result, ts) VALUES (?, ?, ?)", (key, payload, ts))
+        self._mem_put(key, ts, payload)
+    
+    def _mem_put(self, key: str, ts: float, payload: bytes):
+        """Store a serialized in-memory entry, evicting the least recently used ones"""
+        with self._mem_lock:
+            self._mem[key] = (ts, payload)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_max_entries:
+                self._mem.popitem(last=False)
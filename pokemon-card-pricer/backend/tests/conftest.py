@@ -0,0 +1,13 @@
+"""
+Shared test setup: make the backend packages (data, cv) and the flat
+api modules importable the same way the servers import them
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, 'api')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
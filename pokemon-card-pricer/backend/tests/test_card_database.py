@@ -0,0 +1,140 @@
+"""Tests for CardDatabase searches on the SQLite and in-memory paths"""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from data.card_database import CardDatabase, PokemonCard, name_contains
+
+SHIPPED_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'data', 'pokemon_comprehensive.db')
+
+SAMPLE_CARDS = [
+    PokemonCard(name="Charizard", set_name="Base Set", set_number="4/102", rarity="Holo Rare", hp=120),
+    PokemonCard(name="Dark Charizard", set_name="Team Rocket", set_number="4/82", rarity="Holo Rare", hp=80),
+    PokemonCard(name="Pikachu", set_name="Base Set", set_number="58/102", rarity="Common", hp=40),
+    PokemonCard(name="Bill", set_name="Base Set", set_number="91/102", rarity="Common"),
+]
+
+
+@pytest.fixture(scope='module')
+def sql_db():
+    db = CardDatabase(SHIPPED_DB)
+    assert db._conn is not None
+    return db
+
+
+@pytest.fixture
+def memory_db(tmp_path):
+    db = CardDatabase(str(tmp_path / 'missing.db'))
+    assert db._conn is None
+    db.cards = SAMPLE_CARDS
+    return db
+
+
+def test_sql_search_by_name_substring(sql_db):
+    cards = sql_db.search_by_name('pikach')
+
+    assert cards
+    assert all('pikach' in card.name.lower() for card in cards)
+
+
+def test_sql_search_by_name_exact(sql_db):
+    cards = sql_db.search_by_name('CHARIZARD', fuzzy=False)
+
+    assert cards
+    assert {card.name for card in cards} == {'Charizard'}
+
+
+def test_sql_search_by_name_misread(sql_db):
+    cards = sql_db.search_by_name('charlzard')
+
+    assert cards
+    assert cards[0].name == 'Charizard'
+
+
+def test_sql_search_without_fts_index(sql_db, tmp_path):
+    path = tmp_path / 'no_fts.db'
+    shutil.copy(SHIPPED_DB, path)
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            DROP TRIGGER cards_fts_insert;
+            DROP TRIGGER cards_fts_delete;
+            DROP TRIGGER cards_fts_update;
+            DROP TABLE cards_fts;
+        """)
+
+    db = CardDatabase(str(path))
+
+    cards = db.search_by_name('pikachu')
+
+    assert sql_db._has_fts and not db._has_fts
+    assert cards
+    assert cards[0].name.lower().startswith('pikachu')
+    assert all('pikachu' in card.name.lower() for card in cards)
+
+
+def test_sql_search_by_set_number(sql_db):
+    card = sql_db.search_by_name('charizard')[0]
+
+    assert sql_db.search_by_set_number(f" {card.set_number} ").set_number == card.set_number
+    assert sql_db.search_by_set_number('9999/9999') is None
+
+
+def test_memory_search_by_name_substring(memory_db):
+    names = [card.name for card in memory_db.search_by_name('charizard')]
+
+    assert names == ['Charizard', 'Dark Charizard']
+
+
+def test_memory_search_by_name_contained_in_query(memory_db):
+    names = [card.name for card in memory_db.search_by_name('pikachu lv.12')]
+
+    assert names == ['Pikachu']
+
+
+def test_memory_search_by_name_exact(memory_db):
+    assert [card.name for card in memory_db.search_by_name('  charizard ', fuzzy=False)] == ['Charizard']
+    assert memory_db.search_by_name('chari', fuzzy=False) == []
+
+
+def test_memory_search_by_name_misread(memory_db):
+    assert [card.name for card in memory_db.search_by_name('pikaclu')] == ['Pikachu']
+
+
+def test_memory_search_by_set_number(memory_db):
+    card = memory_db.search_by_set_number('58/102')
+
+    assert card.name == 'Pikachu'
+    assert card.hp == 40
+    assert memory_db.search_by_set_number('1/1') is None
+
+
+def test_memory_add_card_is_searchable(memory_db):
+    memory_db.add_card(PokemonCard(name="Raichu", set_name="Base Set", set_number="14/102", rarity="Holo Rare", hp=80))
+
+    assert [card.name for card in memory_db.search_by_name('raichu')] == ['Raichu']
+    assert len(memory_db.cards) == len(SAMPLE_CARDS) + 1
+
+
+def test_cards_is_cached_until_columns_change(memory_db):
+    cards = memory_db.cards
+
+    assert isinstance(cards, tuple)
+    assert memory_db.cards is cards
+
+    memory_db.cards = SAMPLE_CARDS[:2]
+    assert len(memory_db.cards) == 2
+
+
+@pytest.mark.parametrize('query, card_name, expected', [
+    ('charizard', 'Charizard', True),
+    ('dark char', 'Dark Charizard', True),
+    ('charizard dark', 'Dark Charizard', True),
+    ('pikachu lv.12', 'Pikachu', True),
+    ('charlzard', 'Charizard', False),
+])
+def test_name_contains(query, card_name, expected):
+    assert name_contains(query, card_name) is expected
@@ -0,0 +1,60 @@
+"""Tests for CardMatcher.match_card, with and without rapidfuzz"""
+
+import pytest
+
+import card_database
+from card_database import CardMatcher
+
+
+@pytest.fixture(params=['rapidfuzz', 'difflib'])
+def matcher(request, monkeypatch):
+    if request.param == 'rapidfuzz':
+        pytest.importorskip('rapidfuzz')
+    else:
+        monkeypatch.setattr(card_database, 'process', None)
+    return CardMatcher()
+
+
+def test_match_by_set_number(matcher):
+    result = matcher.match_card(name='garbage', set_number=' 4/102 ')
+
+    assert result['card']['name'] == 'Charizard'
+    assert result['confidence'] == 0.98
+    assert result['match_type'] == 'set_number'
+
+
+def test_match_by_exact_name(matcher):
+    result = matcher.match_card(name='Charizard')
+
+    assert result['card']['name'] == 'Charizard'
+    assert result['confidence'] == 0.85
+    assert result['match_type'] == 'name'
+
+
+def test_match_by_name_and_hp(matcher):
+    result = matcher.match_card(name='Charizard', hp=120)
+
+    assert result['card']['name'] == 'Charizard'
+    assert result['confidence'] == pytest.approx(0.9)
+    assert result['match_type'] == 'hp_name_combo'
+
+
+def test_match_by_misread_name(matcher):
+    result = matcher.match_card(name='Charlzard')
+
+    assert result['card']['name'] == 'Charizard'
+    assert result['match_type'] == 'name'
+
+
+def test_misread_name_with_hp_prefers_combo(matcher):
+    result = matcher.match_card(name='Blastolse', hp=100)
+
+    assert result['card']['name'] == 'Blastoise'
+    assert result['match_type'] == 'hp_name_combo'
+    assert 0.85 < result['confidence'] < 0.9
+
+
+def test_no_match(matcher):
+    result = matcher.match_card(name='zzzzqqq')
+
+    assert result == {"card": None, "confidence": 0, "match_type": "no_match"}
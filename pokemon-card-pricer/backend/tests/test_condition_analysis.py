@@ -0,0 +1,125 @@
+"""Tests for the image statistics behind the identifier's condition grades"""
+
+import numpy as np
+import pytest
+
+from card_identifier import SHARPNESS_HIGH, PokemonCardIdentifier
+
+
+def _reference_laplacian_variance(gray: np.ndarray) -> float:
+    """4-neighbour Laplacian with a BORDER_REFLECT_101 border, pixel by pixel"""
+    height, width = gray.shape
+
+    def reflect(i, n):
+        if i < 0:
+            return -i
+        if i >= n:
+            return 2 * n - 2 - i
+        return i
+
+    g = gray.astype(np.float64)
+    lap = np.empty_like(g)
+    for y in range(height):
+        for x in range(width):
+            lap[y, x] = (
+                g[reflect(y - 1, height), x] + g[reflect(y + 1, height), x] +
+                g[y, reflect(x - 1, width)] + g[y, reflect(x + 1, width)] -
+                4 * g[y, x]
+            )
+    return float(lap.var())
+
+
+@pytest.fixture
+def numpy_only(monkeypatch):
+    """Force the NumPy code paths even when OpenCV is installed"""
+    import card_identifier
+    monkeypatch.setattr(card_identifier, 'cv2', None)
+
+
+def test_laplacian_variance_covers_the_border(numpy_only):
+    rng = np.random.default_rng(0)
+    gray = rng.integers(0, 256, size=(13, 17), dtype=np.uint8)
+
+    assert PokemonCardIdentifier._laplacian_variance(gray) == pytest.approx(
+        _reference_laplacian_variance(gray), rel=1e-5
+    )
+
+
+def test_laplacian_variance_of_flat_image_is_zero(numpy_only):
+    gray = np.full((32, 32), 128, dtype=np.uint8)
+
+    assert PokemonCardIdentifier._laplacian_variance(gray) == 0.0
+
+
+def test_laplacian_variance_matches_opencv(monkeypatch):
+    pytest.importorskip('cv2')
+    import card_identifier
+
+    rng = np.random.default_rng(1)
+    gray = rng.integers(0, 256, size=(64, 48), dtype=np.uint8)
+    with_cv2 = PokemonCardIdentifier._laplacian_variance(gray)
+
+    monkeypatch.setattr(card_identifier, 'cv2', None)
+    assert PokemonCardIdentifier._laplacian_variance(gray) == pytest.approx(with_cv2, rel=1e-4)
+
+
+@pytest.mark.parametrize('use_cv2', [True, False])
+def test_mean_std_pools_all_rgb_values(monkeypatch, use_cv2):
+    import card_identifier
+    if use_cv2:
+        pytest.importorskip('cv2')
+    else:
+        monkeypatch.setattr(card_identifier, 'cv2', None)
+
+    rng = np.random.default_rng(2)
+    rgb = rng.integers(0, 256, size=(20, 30, 3), dtype=np.uint8)
+
+    mean, std = PokemonCardIdentifier._mean_std(rgb)
+    assert mean == pytest.approx(rgb.mean())
+    assert std == pytest.approx(rgb.std())
+
+
+def test_analyze_condition_reports_rgb_brightness(tmp_path):
+    from PIL import Image
+
+    # Pure red: RGB mean is 85, while its luma would be about 76
+    path = tmp_path / 'red.png'
+    Image.new('RGB', (64, 64), (255, 0, 0)).save(path)
+
+    identifier = PokemonCardIdentifier.__new__(PokemonCardIdentifier)
+    analysis = identifier._analyze_condition(str(path))['analysis']
+
+    assert analysis['brightness'] == pytest.approx(85.0)
+    assert analysis['contrast'] == pytest.approx(np.std([255, 0, 0]), abs=0.1)
+
+
+def _grade(tmp_path, image):
+    path = tmp_path / 'card.png'
+    image.save(path)
+    identifier = PokemonCardIdentifier.__new__(PokemonCardIdentifier)
+    return identifier._analyze_condition(str(path))
+
+
+def test_condition_bands_for_flat_image(tmp_path):
+    from PIL import Image
+
+    # Ideal brightness, no contrast, no detail
+    grades = _grade(tmp_path, Image.new('RGB', (64, 64), (150, 150, 150)))
+
+    assert 8.2 <= grades['centering'] <= 8.8   # 7 + 1.5 brightness
+    assert 6.2 <= grades['surface'] <= 6.8     # 7 - 0.5 contrast
+    assert 6.7 <= grades['edges'] <= 7.3       # 7 + 0.0 sharpness
+
+
+def test_condition_bands_for_sharp_image(tmp_path):
+    from PIL import Image
+
+    # 8px checkerboard of two greys: mean 150, std 50, hard edges
+    rows, cols = np.indices((128, 128)) // 8
+    gray = np.where((rows + cols) % 2, 200, 100).astype(np.uint8)
+    grades = _grade(tmp_path, Image.fromarray(np.dstack([gray] * 3)))
+
+    assert grades['analysis']['sharpness'] > SHARPNESS_HIGH
+    assert 8.2 <= grades['centering'] <= 8.8   # 7 + 1.5 brightness
+    assert 7.7 <= grades['surface'] <= 8.3     # 7 + 1.0 contrast
+    assert 7.7 <= grades['edges'] <= 8.3       # 7 + 1.0 sharpness
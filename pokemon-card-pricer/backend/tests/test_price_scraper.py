@@ -0,0 +1,43 @@
+"""Tests for the listing text parsing in PokemonPriceScraper"""
+
+import pytest
+
+from data.price_scraper import PokemonPriceScraper
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    return PokemonPriceScraper(http_cache_path=str(tmp_path / 'http_cache'))
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$1,234.56', 1234.56),
+    ('$45', 45.0),
+    ('US $12.99', 12.99),
+    ('£8.50', 8.5),
+    ('', 0.0),
+    (None, 0.0),
+    ('Free shipping', 0.0),
+])
+def test_extract_price(scraper, text, expected):
+    assert scraper._extract_price(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Charizard PSA 10 Gem Mint', 'PSA 10'),
+    ('bgs 9.5 Pikachu 58/102', 'BGS 9.5'),
+    ('Blastoise CGC8.5 Holo', 'CGC 8.5'),
+    ('SGC 9 Venusaur', 'SGC 9'),
+    ('Lightly Played Mewtwo', 'Lightly Played'),
+    ('Machamp heavy played', 'Heavily Played'),
+    ('Damaged Gyarados', 'Damaged'),
+    ('Base Set Charizard Holo', 'Ungraded'),
+    ('', 'Ungraded'),
+])
+def test_extract_grade(scraper, text, expected):
+    assert scraper._extract_grade(text) == expected
+
+
+def test_extract_grade_prefers_earlier_pattern(scraper):
+    # Slab grades are checked before condition words anywhere in the title
+    assert scraper._extract_grade('Mint condition Charizard PSA 9') == 'PSA 9'
@@ -75,17 +75,48 @@ class ComprehensivePokemonDB:
         
         # Create indexes for fast searching
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_name ON cards(name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_name_lower ON cards(LOWER(name))")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_set ON cards(set_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_number ON cards(number)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_type ON cards(card_type)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_rarity ON cards(rarity)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_fulltext ON cards(name, set_name, card_type)")
         
+        # FTS5 index over card names for prefix search, kept in sync by triggers
+        self.setup_name_search(cursor)
+        
         conn.commit()
         conn.close()
         
         print("✅ Comprehensive database schema created")
     
+    def setup_name_search(self, cursor):
+        """Create the cards_fts name index (filled from existing cards) and its triggers"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'"
+        ).fetchone()
+        
+        try:
+            if not exists:
+                cursor.execute("CREATE VIRTUAL TABLE cards_fts USING fts5(name, content='cards', content_rowid='id')")
+                cursor.execute("INSERT INTO cards_fts(cards_fts) VALUES('rebuild')")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ FTS5 not available, skipping name search index: {e}")
+            return
+        
+        cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards BEGIN
+                INSERT INTO cards_fts(rowid, name) VALUES (new.id, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards BEGIN
+                INSERT INTO cards_fts(cards_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS cards_fts_update AFTER UPDATE OF name ON cards BEGIN
+                INSERT INTO cards_fts(cards_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO cards_fts(rowid, name) VALUES (new.id, new.name);
+            END;
+        """)
+    
     def populate_base_sets(self):
         """Add all major Pokemon card sets"""
         sets_data = [
@@ -26,8 +26,8 @@ def check_system_requirements():
     print("🔍 Checking system requirements...")
     
     # Check Python version
-    if sys.version_info < (3, 8):
-        print(f"   ❌ Python 3.8+ required, found {sys.version}")
+    if sys.version_info < (3, 10):
+        print(f"   ❌ Python 3.10+ required, found {sys.version}")
         return False
     print(f"   ✅ Python {sys.version}")
     